@@ -10,7 +10,18 @@ from sqlalchemy.engine import make_url
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
+from migrations import run_migrations
 from models import Admin, db
+from utils.activity_rollups import refresh_activity_rollups
+from utils.event_broker import event_broker
+from utils.json_provider import FastJSONProvider
+from utils.mentor_performance import refresh_mentor_performance
+from utils.passwords import password_pool
+from utils.presence import presence
+from utils.retention import apply_retention
+from utils.rollups import rollup_scheduler
+from utils.screenshot_ingest import screenshot_ingest
+from utils.screenshot_store import collect_screenshot_blobs
 
 
 def _sync_sqlite_legacy_schema(database_uri):
@@ -145,12 +156,14 @@ def initialize_database(app):
         _create_database_if_not_exists(app.config["SQLALCHEMY_DATABASE_URI"])
         _sync_sqlite_legacy_schema(app.config["SQLALCHEMY_DATABASE_URI"])
         db.create_all()
+        run_migrations(db.engine)
         _seed_default_superadmin()
         print("Database schema verified.")
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
     app.config.from_object(config_class)
 
@@ -200,6 +213,15 @@ def create_app(config_class=Config):
     app.limiter = limiter
 
     os.makedirs(app.config["SCREENSHOT_FOLDER"], exist_ok=True)
+    screenshot_ingest.init_app(app)
+    password_pool.init_app(app)
+    event_broker.init_app(app)
+    presence.init_app(app)
+    rollup_scheduler.init_app(app)
+    rollup_scheduler.register("mentor_performance", refresh_mentor_performance)
+    rollup_scheduler.register("activity_rollups", refresh_activity_rollups)
+    rollup_scheduler.register("retention", apply_retention)
+    rollup_scheduler.register("screenshot_gc", collect_screenshot_blobs)
 
     @app.before_request
     def _enforce_allowed_origins():
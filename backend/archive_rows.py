@@ -0,0 +1,68 @@
+"""
+Retention archives for the activity and logs tables.
+
+    python archive_rows.py run                         archive expired rows now
+    python archive_rows.py list [table]                show archive manifests
+    python archive_rows.py restore <table> [from] [to] restore archives overlapping
+                                                       the YYYY-MM-DD range
+    python archive_rows.py restore <file.jsonl.gz>     restore one archive
+
+"run" needs ACTIVITY_RETENTION_DAYS / LOG_RETENTION_DAYS set and takes the
+same lease as the background job, so it never runs alongside it.
+Restoring is safe to repeat — rows whose id already exists are skipped.
+"""
+import os
+import sys
+
+from app import app, initialize_database
+from utils.archive import list_archives, restore_archive
+from utils.rollups import rollup_scheduler
+
+
+def _overlaps(manifest, start, end):
+    if not manifest["time_from"] or not manifest["time_to"]:
+        return True
+    return (not end or manifest["time_from"][:10] <= end) and (not start or manifest["time_to"][:10] >= start)
+
+
+def select_archives(target, start=None, end=None):
+    if target.endswith(".jsonl.gz"):
+        path = os.path.abspath(target)
+        return [m for m in list_archives(app.config["ARCHIVE_FOLDER"]) if os.path.abspath(m["path"]) == path]
+    return [m for m in list_archives(app.config["ARCHIVE_FOLDER"], target) if _overlaps(m, start, end)]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    initialize_database(app)
+
+    with app.app_context():
+        if command == "run":
+            print("\n🗄️  Archiving expired rows...")
+            if rollup_scheduler.run("retention", force_full=True):
+                print("\n✅ Done!\n")
+            else:
+                print("\n⏭️  Another worker holds the retention lease, try again later.\n")
+
+        elif command == "list":
+            manifests = list_archives(app.config["ARCHIVE_FOLDER"], sys.argv[2] if len(sys.argv) > 2 else None)
+            for manifest in manifests:
+                print(
+                    f"  {manifest['file']}  {manifest['rows']} row(s)  "
+                    f"{manifest['time_from']} → {manifest['time_to']}"
+                )
+            print(f"\n{len(manifests)} archive(s) in {app.config['ARCHIVE_FOLDER']}\n")
+
+        elif command == "restore" and len(sys.argv) > 2:
+            manifests = select_archives(*sys.argv[2:5])
+            restored = 0
+            print(f"\n♻️  Restoring {len(manifests)} archive(s)...")
+            for manifest in manifests:
+                inserted = restore_archive(manifest)
+                restored += inserted
+                print(f"  ✅ {manifest['file']} — {inserted} row(s) inserted")
+            print(f"\n✅ Done! {restored} row(s) restored.\n")
+
+        else:
+            print(__doc__)
+            sys.exit(1)
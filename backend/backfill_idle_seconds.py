@@ -0,0 +1,79 @@
+"""
+One-time backfill: compute logs.idle_seconds for sessions recorded before the
+column was maintained at write time.
+Run ONCE with: python backfill_idle_seconds.py
+Safe to run multiple times — only rows whose idle_seconds is still 0 are touched.
+"""
+from app import app, initialize_database
+from models import db, Log, Activity
+from utils.event_broker import publish_change
+from utils.idle_index import IdleIndex, normalize_username, session_window
+
+BATCH_SIZE = 500
+
+
+def backfill_batch(logs):
+    windows = {}
+    for log in logs:
+        if normalize_username(log.username):
+            window = session_window(log.login_time, log.logout_time)
+            if window is not None:
+                windows[log.id] = window
+
+    if not windows:
+        return 0
+
+    usernames = {normalize_username(log.username) for log in logs if log.id in windows}
+    window_start = min(start for start, _ in windows.values())
+    window_end = max(end for _, end in windows.values())
+
+    idle_rows = (
+        db.session.query(Activity.username, Activity.created_at, Activity.idle_time)
+        .filter(
+            db.func.lower(Activity.username).in_(usernames),
+            Activity.idle_time.isnot(None),
+            Activity.idle_time > 0,
+            Activity.created_at >= window_start.replace(tzinfo=None),
+            Activity.created_at <= window_end.replace(tzinfo=None),
+        )
+        .all()
+    )
+    idle_index = IdleIndex.from_events(idle_rows)
+
+    updated = 0
+    for log in logs:
+        window = windows.get(log.id)
+        total = idle_index.total(log.username, *window) if window else 0
+        if total:
+            log.idle_seconds = total
+            updated += 1
+    return updated
+
+
+if __name__ == "__main__":
+    initialize_database(app)
+
+    with app.app_context():
+        updated = 0
+        last_id = 0
+
+        print("\n⏱️  Backfilling session idle time...")
+        while True:
+            logs = (
+                Log.query.filter(Log.id > last_id, Log.idle_seconds == 0)
+                .order_by(Log.id.asc())
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not logs:
+                break
+
+            last_id = logs[-1].id
+            batch_updated = backfill_batch(logs)
+            if batch_updated:
+                publish_change("logs", "updated")
+            updated += batch_updated
+            db.session.commit()
+            print(f"  ✅ Processed logs up to id {last_id}")
+
+        print(f"\n✅ Done! {updated} session(s) updated.\n")
@@ -65,6 +65,109 @@ class Config:
         os.environ.get("SCREENSHOT_FOLDER", "storage/screenshots"),
     )
 
+    # Uploaded screenshots are spooled here still base64-encoded and decoded
+    # by a bounded background worker pool (see utils/screenshot_ingest.py).
+    SCREENSHOT_SPOOL_FOLDER = os.path.join(
+        BASE_DIR,
+        os.environ.get("SCREENSHOT_SPOOL_FOLDER", "storage/spool"),
+    )
+    SCREENSHOT_WORKERS = int(os.environ.get("SCREENSHOT_WORKERS", 2))
+    # Spool files at least this old that are not queued (rejected, or left by
+    # a dead worker) are re-queued by a sweep that runs this often.
+    SCREENSHOT_SWEEP_SECONDS = int(os.environ.get("SCREENSHOT_SWEEP_SECONDS", 60))
+    SCREENSHOT_QUEUE_SIZE = int(os.environ.get("SCREENSHOT_QUEUE_SIZE", 64))
+    SCREENSHOT_RECOMPRESS = _get_bool("SCREENSHOT_RECOMPRESS", default=False)
+    SCREENSHOT_THUMBNAIL_SIZE = int(os.environ.get("SCREENSHOT_THUMBNAIL_SIZE", 320))
+    SCREENSHOT_MAX_BYTES = int(os.environ.get("SCREENSHOT_MAX_BYTES", 10 * 1024 * 1024))
+
+    # Password hashing (utils/passwords.py). The KDF runs in a pool of
+    # PASSWORD_WORKERS processes per gunicorn worker (0 runs it inline); past
+    # PASSWORD_QUEUE_LIMIT pending calls, logins are answered 503. Changing
+    # PASSWORD_HASH_METHOD (werkzeug syntax, e.g. "pbkdf2:sha256:1000000")
+    # re-hashes each password at its owner's next login. HTTP bulk imports
+    # queue at most PASSWORD_IMPORT_CHUNK hashes at a time alongside logins.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_WORKERS = int(os.environ.get("PASSWORD_WORKERS", 2))
+    PASSWORD_QUEUE_LIMIT = int(os.environ.get("PASSWORD_QUEUE_LIMIT", 16))
+    PASSWORD_TIMEOUT_SECONDS = float(os.environ.get("PASSWORD_TIMEOUT_SECONDS", 10))
+    PASSWORD_IMPORT_CHUNK = int(os.environ.get("PASSWORD_IMPORT_CHUNK", 4))
+
+    # Presence (utils/presence.py). Login/logout/heartbeats go to a SQLite file
+    # shared by the workers on this host; users silent for
+    # PRESENCE_TIMEOUT_SECONDS turn Offline, and the users/admins status
+    # columns are updated in batches every PRESENCE_FLUSH_SECONDS.
+    PRESENCE_STORE_PATH = os.path.join(
+        BASE_DIR,
+        os.environ.get("PRESENCE_STORE_PATH", "storage/presence.sqlite3"),
+    )
+    PRESENCE_TIMEOUT_SECONDS = int(os.environ.get("PRESENCE_TIMEOUT_SECONDS", 900))
+    PRESENCE_FLUSH_SECONDS = float(os.environ.get("PRESENCE_FLUSH_SECONDS", 30))
+
+    # Process-local cache of Admin/User lookups by username (utils/actor_cache.py).
+    ACTOR_CACHE_TTL = int(os.environ.get("ACTOR_CACHE_TTL", 60))
+    ACTOR_CACHE_SIZE = int(os.environ.get("ACTOR_CACHE_SIZE", 2048))
+
+    # How long a worker trusts its cached profile_version for /api/session.
+    SESSION_VERSION_TTL = int(os.environ.get("SESSION_VERSION_TTL", 30))
+    SESSION_VERSION_CACHE_SIZE = int(os.environ.get("SESSION_VERSION_CACHE_SIZE", 4096))
+
+    # ?since= delta sync: overlap re-sent on each poll, and how long delete
+    # tombstones are kept before clients must do a full refresh.
+    SYNC_OVERLAP_SECONDS = int(os.environ.get("SYNC_OVERLAP_SECONDS", 5))
+    TOMBSTONE_RETENTION_DAYS = int(os.environ.get("TOMBSTONE_RETENTION_DAYS", 7))
+
+    # /api/stream (Server-Sent Events). Each worker process polls the
+    # change_events table once per interval on behalf of all its subscribers.
+    STREAM_POLL_INTERVAL = float(os.environ.get("STREAM_POLL_INTERVAL", 1.0))
+    STREAM_HEARTBEAT_SECONDS = int(os.environ.get("STREAM_HEARTBEAT_SECONDS", 15))
+    STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", 256))
+    STREAM_REPLAY_LIMIT = int(os.environ.get("STREAM_REPLAY_LIMIT", 500))
+    # Events this recent are re-read on every poll, so a transaction that
+    # commits after a higher id was already delivered is still fanned out.
+    STREAM_OVERLAP_SECONDS = int(os.environ.get("STREAM_OVERLAP_SECONDS", 10))
+    CHANGE_EVENT_RETENTION_MINUTES = int(os.environ.get("CHANGE_EVENT_RETENTION_MINUTES", 60))
+
+    # /api/dashboard/summary results are reused until a tracked table changes
+    # or this many seconds pass (the activity_today counts only refresh then).
+    DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", 15))
+
+    # Background rollup jobs (utils/rollups.py). Each job runs at most once per
+    # interval across all workers, incrementally, with a periodic full rebuild.
+    ROLLUP_JOBS_ENABLED = _get_bool("ROLLUP_JOBS_ENABLED", default=True)
+    ROLLUP_INTERVAL_SECONDS = int(os.environ.get("ROLLUP_INTERVAL_SECONDS", 300))
+    ROLLUP_FULL_REFRESH_HOURS = int(os.environ.get("ROLLUP_FULL_REFRESH_HOURS", 24))
+    MENTOR_SESSION_WINDOW_DAYS = int(os.environ.get("MENTOR_SESSION_WINDOW_DAYS", 30))
+
+    # Retention (utils/retention.py): Activity/Log rows older than this many
+    # days are written to gzip JSONL archives under ARCHIVE_FOLDER and removed
+    # in batches by the "retention" job. 0 (the default) keeps rows forever.
+    ACTIVITY_RETENTION_DAYS = int(os.environ.get("ACTIVITY_RETENTION_DAYS", 0))
+    LOG_RETENTION_DAYS = int(os.environ.get("LOG_RETENTION_DAYS", 0))
+    ARCHIVE_FOLDER = os.path.join(
+        BASE_DIR,
+        os.environ.get("ARCHIVE_FOLDER", "storage/archive"),
+    )
+    RETENTION_BATCH_SIZE = int(os.environ.get("RETENTION_BATCH_SIZE", 5000))
+    RETENTION_MAX_BATCHES = int(os.environ.get("RETENTION_MAX_BATCHES", 20))
+    # Months of partitions created ahead on Postgres tables converted by
+    # partition_postgres.py.
+    PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", 2))
+
+    # Rows fetched and written per chunk by the /logs/export and
+    # /activity/export streams.
+    EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 1000))
+
+    # Custom IDs (US/IN/26/0001, ...) come from the id_counters table. Above 1,
+    # each worker reserves this many numbers at a time and hands them out
+    # from memory; unused ones are skipped when the worker restarts.
+    CUSTOM_ID_BLOCK_SIZE = int(os.environ.get("CUSTOM_ID_BLOCK_SIZE", 1))
+
+    # Records accepted per POST /users/import or /admins/import request; the
+    # import_principals.py CLI has no cap.
+    BULK_IMPORT_MAX_ROWS = int(os.environ.get("BULK_IMPORT_MAX_ROWS", 500))
+
+    ACTIVITY_BATCH_MAX_EVENTS = int(os.environ.get("ACTIVITY_BATCH_MAX_EVENTS", 500))
+
     allowed_origins_env = os.environ.get(
         "ALLOWED_ORIGINS",
         "http://localhost:5173,http://localhost:3000",
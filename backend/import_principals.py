@@ -0,0 +1,45 @@
+"""
+Bulk-create users or admins from a CSV (with a header row) or JSON file.
+
+    python import_principals.py users  intake.csv  [--dry-run]
+    python import_principals.py admins mentors.json [--dry-run]
+
+Columns/keys are the ones POST /api/users and /api/admins accept (username or
+fullName, email, password, role, domain, designation, ...). Unlike the HTTP
+endpoint there is no row cap, and passwords are hashed on every CPU core.
+Rows that fail validation or already exist are reported and skipped.
+"""
+import os
+import sys
+
+from app import app, initialize_database
+from models import Admin, User
+from utils.bulk_import import import_principals, parse_records
+
+MODELS = {"users": (User, "user"), "admins": (Admin, "admin")}
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--dry-run"]
+    if len(args) != 2 or args[0] not in MODELS:
+        print(__doc__)
+        sys.exit(1)
+
+    model, kind = MODELS[args[0]]
+    path = args[1]
+    dry_run = "--dry-run" in sys.argv
+    with open(path, encoding="utf-8-sig") as handle:
+        records = parse_records(handle.read(), path.lower().endswith(".csv"))
+
+    app.config["PASSWORD_WORKERS"] = os.cpu_count() or 1
+    initialize_database(app)
+
+    with app.app_context():
+        print(f"\n📥 Importing {len(records)} {kind} record(s) from {path}...")
+        result = import_principals(model, kind, records, dry_run=dry_run)
+        for error in result["errors"]:
+            print(f"  ⏭️  row {error['row']} — {error['error']}")
+        if dry_run:
+            print(f"\n✅ Dry run: {result['valid']} record(s) would be created.\n")
+        else:
+            print(f"\n✅ Done! {result['created']} {kind}(s) created.\n")
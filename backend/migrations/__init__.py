@@ -0,0 +1,93 @@
+"""
+Versioned schema migrations.
+
+Each ``vNNNN_*.py`` module in this package defines ``upgrade(connection)``
+and runs once per database, in version order, after ``db.create_all()``.
+Applied versions are recorded in the ``schema_migrations`` table. Migrations
+must be safe on both fresh databases (where create_all already built the
+current tables) and old ones, so they check before altering anything.
+"""
+import importlib
+import pkgutil
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+
+from utils.datetime_utils import now_ist_naive
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String(100), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def available_migrations():
+    names = sorted(
+        module.name
+        for module in pkgutil.iter_modules(__path__)
+        if module.name.startswith("v") and module.name[1:5].isdigit()
+    )
+    return [(name, importlib.import_module(f"{__name__}.{name}")) for name in names]
+
+
+def run_migrations(engine):
+    """Apply every pending migration, each in its own transaction. Returns the versions applied."""
+    _metadata.create_all(engine)
+
+    with engine.connect() as connection:
+        applied = set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+    newly_applied = []
+    for version, module in available_migrations():
+        if version in applied:
+            continue
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(
+                schema_migrations.insert().values(version=version, applied_at=now_ist_naive())
+            )
+        print(f"Applied migration {version}.")
+        newly_applied.append(version)
+    return newly_applied
+
+
+# ── Helpers for migration modules ──
+
+def has_table(connection, table_name):
+    return table_name in inspect(connection).get_table_names()
+
+
+def has_column(connection, table_name, column_name):
+    return any(column["name"] == column_name for column in inspect(connection).get_columns(table_name))
+
+
+def has_index(connection, table_name, index_name):
+    return any(index["name"] == index_name for index in inspect(connection).get_indexes(table_name))
+
+
+def add_column(connection, table_name, column_name, ddl):
+    if has_table(connection, table_name) and not has_column(connection, table_name, column_name):
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}"))
+
+
+def create_index(connection, index_name, table_name, columns, where=None):
+    """
+    CREATE INDEX unless it already exists. ``where`` makes it a partial index
+    on dialects that support one (SQLite, Postgres) and is dropped elsewhere,
+    leaving a plain composite index.
+    """
+    if not has_table(connection, table_name):
+        return
+
+    if connection.dialect.name in {"sqlite", "postgresql"}:
+        # IF NOT EXISTS also covers expression indexes, which reflection skips.
+        statement = f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(columns)})"
+        if where:
+            statement += f" WHERE {where}"
+    else:
+        if has_index(connection, table_name, index_name):
+            return
+        statement = f"CREATE INDEX {index_name} ON {table_name} ({', '.join(columns)})"
+    connection.execute(text(statement))
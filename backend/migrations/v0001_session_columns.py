@@ -0,0 +1,8 @@
+"""Columns added after first release: logs.idle_seconds and principal profile versions."""
+from migrations import add_column
+
+
+def upgrade(connection):
+    add_column(connection, "logs", "idle_seconds", "INTEGER NOT NULL DEFAULT 0")
+    add_column(connection, "users", "profile_version", "INTEGER NOT NULL DEFAULT 1")
+    add_column(connection, "admins", "profile_version", "INTEGER NOT NULL DEFAULT 1")
@@ -0,0 +1,14 @@
+"""updated_at watermarks and their indexes for ?since= delta sync on the list endpoints."""
+from migrations import add_column, create_index
+
+SYNCED_TABLES = ("users", "admins", "logs", "activity", "daily_reports", "weekly_reports", "tasks")
+
+
+def upgrade(connection):
+    column_type = "TIMESTAMP" if connection.dialect.name == "postgresql" else "DATETIME"
+
+    for table_name in SYNCED_TABLES:
+        # Rows that predate the column stay NULL: they are only served by full
+        # fetches, which is what any client without a watermark does first.
+        add_column(connection, table_name, "updated_at", f"{column_type} NULL")
+        create_index(connection, f"ix_{table_name}_updated_at", table_name, ["updated_at"])
@@ -0,0 +1,6 @@
+"""Index for rebuilding one user's activity rollup day from their sessions."""
+from migrations import create_index
+
+
+def upgrade(connection):
+    create_index(connection, "ix_logs_username_login_time", "logs", ["username", "login_time"])
@@ -8,5 +8,12 @@ from .report import DailyReport, WeeklyReport
 from .task import Task
 from .log import Log
 from .activity import Activity
+from .screenshot import ScreenshotBlob
+from .tombstone import Tombstone
+from .change_event import ChangeEvent
+from .table_version import TableVersion
+from .rollup import RollupState, MentorPerformance
+from .activity_rollup import ActivityHourly, ActivityDaily
+from .id_counter import IdCounter
 
-__all__ = ['db', 'User', 'Admin', 'DailyReport', 'WeeklyReport', 'Task', 'Log', 'Activity']
+__all__ = ['db', 'User', 'Admin', 'DailyReport', 'WeeklyReport', 'Task', 'Log', 'Activity', 'ScreenshotBlob', 'Tombstone', 'ChangeEvent', 'TableVersion', 'RollupState', 'MentorPerformance', 'ActivityHourly', 'ActivityDaily', 'IdCounter']
@@ -1,5 +1,6 @@
 from models import db
-from utils.datetime_utils import now_ist, to_ist_iso
+from utils.datetime_utils import now_ist, now_ist_naive, to_ist_iso
+from .screenshot import digest_from_path
 
 
 class Activity(db.Model):
@@ -14,13 +15,20 @@ class Activity(db.Model):
     screenshot_path = db.Column(db.String(255), nullable=True)
     app_url = db.Column(db.String(255), nullable=True)
     activity_metadata = db.Column("metadata", db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, default=now_ist_naive, onupdate=now_ist_naive)
 
     created_at = db.Column(
         db.DateTime,
         default=now_ist
     )
 
+    SERIALIZED_COLUMNS = (
+        "id", "username", "action", "login_time", "logout_time", "idle_time",
+        "screenshot_path", "app_url", "activity_metadata", "created_at",
+    )
+
     def to_dict(self):
+        screenshot_digest = digest_from_path(self.screenshot_path)
         return {
             "id": self.id,
             "username": self.username,
@@ -29,6 +37,10 @@ class Activity(db.Model):
             "logout_time": to_ist_iso(self.logout_time),
             "idle_time": self.idle_time,
             "screenshot_path": self.screenshot_path,
+            "thumbnail_url": (
+                f"/api/screenshots/{screenshot_digest}/thumbnail"
+                if screenshot_digest else None
+            ),
             "app_url": self.app_url,
             "metadata": self.activity_metadata,
             "created_at": to_ist_iso(self.created_at)
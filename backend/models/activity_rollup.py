@@ -0,0 +1,49 @@
+import json
+
+from models import db
+from utils.datetime_utils import to_ist_iso
+
+
+class _ActivityBucket:
+    """Columns shared by the hourly and daily per-user activity rollups."""
+
+    username = db.Column(db.String(100), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    events = db.Column(db.Integer, nullable=False, default=0)
+    logins = db.Column(db.Integer, nullable=False, default=0)
+    logouts = db.Column(db.Integer, nullable=False, default=0)
+    idle_events = db.Column(db.Integer, nullable=False, default=0)
+    app_usage_events = db.Column(db.Integer, nullable=False, default=0)
+    screenshots = db.Column(db.Integer, nullable=False, default=0)
+    idle_seconds = db.Column(db.Integer, nullable=False, default=0)
+    session_seconds = db.Column(db.Integer, nullable=False, default=0)
+    # JSON array of the distinct app_urls seen in the bucket.
+    app_urls = db.Column(db.Text, nullable=True)
+
+    def app_url_list(self):
+        return json.loads(self.app_urls) if self.app_urls else []
+
+    def to_dict(self):
+        app_urls = self.app_url_list()
+        return {
+            "username": self.username,
+            "bucket_start": to_ist_iso(self.bucket_start),
+            "events": self.events,
+            "logins": self.logins,
+            "logouts": self.logouts,
+            "idle_events": self.idle_events,
+            "app_usage_events": self.app_usage_events,
+            "screenshots": self.screenshots,
+            "idle_seconds": self.idle_seconds,
+            "session_seconds": self.session_seconds,
+            "distinct_apps": len(app_urls),
+            "app_urls": app_urls
+        }
+
+
+class ActivityHourly(_ActivityBucket, db.Model):
+    __tablename__ = "activity_hourly"
+
+
+class ActivityDaily(_ActivityBucket, db.Model):
+    __tablename__ = "activity_daily"
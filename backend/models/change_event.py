@@ -0,0 +1,27 @@
+from . import db
+from utils.datetime_utils import now_ist_naive, to_ist_iso
+
+
+class ChangeEvent(db.Model):
+    """
+    A write that dashboards should hear about, fanned out by /api/stream.
+
+    Rows are inserted in the same transaction as the change they describe, so
+    every gunicorn worker sees the same ordered feed once it commits.
+    """
+    __tablename__ = 'change_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(50), nullable=False)
+    action = db.Column(db.String(20), nullable=False)
+    row_id = db.Column(db.String(50), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=now_ist_naive, index=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "topic": self.topic,
+            "action": self.action,
+            "row_id": self.row_id,
+            "created_at": to_ist_iso(self.created_at)
+        }
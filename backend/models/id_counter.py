@@ -0,0 +1,13 @@
+from . import db
+
+
+class IdCounter(db.Model):
+    """
+    Last number issued per custom-ID prefix and year, e.g. ("US", "26") → 42
+    once US/IN/26/0042 has been handed out (see utils/custom_ids.py).
+    """
+    __tablename__ = 'id_counters'
+
+    prefix = db.Column(db.String(10), primary_key=True)
+    year_short = db.Column(db.String(2), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
@@ -1,5 +1,17 @@
+import re
+from functools import lru_cache
+
 from . import db
-from utils.datetime_utils import to_ist_iso
+from utils.datetime_utils import now_ist_naive, to_ist_iso
+
+_LOGOUT_ACTION = re.compile("logout|log out|logged out|session completed|session end")
+
+
+@lru_cache(maxsize=1024)
+def is_logout_action(action):
+    """Whether a log action text describes a session ending."""
+    return _LOGOUT_ACTION.search((action or "").lower()) is not None
+
 
 class Log(db.Model):
     __tablename__ = 'logs'
@@ -12,30 +24,33 @@ class Log(db.Model):
     role = db.Column(db.String(20))
     designation = db.Column(db.String(50))
     action = db.Column(db.String(255))
+    # Idle seconds accumulated for this session, maintained by save_activity.
+    idle_seconds = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(db.DateTime, default=now_ist_naive, onupdate=now_ist_naive)
 
-    def to_dict(self):
-        normalized_action = (self.action or "").strip().lower()
-        is_logout_action = (
-            "logout" in normalized_action
-            or "log out" in normalized_action
-            or "logged out" in normalized_action
-            or "session completed" in normalized_action
-            or "session end" in normalized_action
-        )
+    # Columns to_dict reads; utils.serializers selects only these.
+    SERIALIZED_COLUMNS = (
+        "id", "username", "login_time", "logout_time", "email", "domain",
+        "role", "designation", "action", "idle_seconds",
+    )
 
+    def to_dict(self):
+        login_time = to_ist_iso(self.login_time)
+        logout_time = to_ist_iso(self.logout_time)
         return {
             "id": self.id,
             "username": self.username,
-            "login_time": to_ist_iso(self.login_time),
-            "logout_time": to_ist_iso(self.logout_time),
+            "login_time": login_time,
+            "logout_time": logout_time,
             "timestamp": (
-                to_ist_iso(self.logout_time)
-                if is_logout_action and self.logout_time
-                else (to_ist_iso(self.login_time) or to_ist_iso(self.logout_time))
+                logout_time
+                if logout_time and is_logout_action(self.action)
+                else login_time or logout_time
             ),
             "email": self.email,
             "domain": self.domain,
             "role": self.role,
             "designation": self.designation,
-            "action": self.action
+            "action": self.action,
+            "idle_time": self.idle_seconds or 0
         }
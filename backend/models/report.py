@@ -1,4 +1,5 @@
 from . import db
+from utils.datetime_utils import now_ist_naive
 
 
 # ── Daily Report ───
@@ -17,6 +18,12 @@ class DailyReport(db.Model):
     reportContent = db.Column(db.Text)
     mobileNumber = db.Column(db.String(20))
     email        = db.Column(db.String(100))
+    updated_at   = db.Column(db.DateTime, default=now_ist_naive, onupdate=now_ist_naive)
+
+    SERIALIZED_COLUMNS = (
+        "id", "title", "projectName", "designation", "name", "createdBy", "status",
+        "date", "day", "reportContent", "mobileNumber", "email",
+    )
 
     def to_dict(self):
         return {
@@ -55,6 +62,13 @@ class WeeklyReport(db.Model):
     # Weekly-only fields
     weeklySummary   = db.Column(db.Text)
     attachmentName  = db.Column(db.String(100))
+    updated_at      = db.Column(db.DateTime, default=now_ist_naive, onupdate=now_ist_naive)
+
+    SERIALIZED_COLUMNS = (
+        "id", "title", "projectName", "designation", "name", "createdBy", "status",
+        "date", "day", "reportContent", "mobileNumber", "email", "weeklySummary",
+        "attachmentName",
+    )
 
     def to_dict(self):
         return {
@@ -0,0 +1,70 @@
+from . import db
+from utils.datetime_utils import to_ist_iso
+
+
+class RollupState(db.Model):
+    """
+    Bookkeeping for one background rollup job (see utils/rollups.py).
+
+    ``lease_until`` doubles as the next time any worker may run the job, so
+    with several gunicorn workers each refresh still happens once.
+    """
+    __tablename__ = 'rollup_state'
+
+    name = db.Column(db.String(50), primary_key=True)
+    # Highest source row id already folded in, for append-only sources.
+    watermark = db.Column(db.Integer, nullable=True)
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+    full_refreshed_at = db.Column(db.DateTime, nullable=True)
+    lease_until = db.Column(db.DateTime, nullable=True)
+
+
+class MentorPerformance(db.Model):
+    """Precomputed /api/mentors/performance row for one mentor (an Admin)."""
+    __tablename__ = 'mentor_performance'
+
+    admin_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80))
+    domain = db.Column(db.String(100))
+    members = db.Column(db.Integer, nullable=False, default=0)
+    tasks_total = db.Column(db.Integer, nullable=False, default=0)
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+    tasks_checked = db.Column(db.Integer, nullable=False, default=0)
+    tasks_on_time = db.Column(db.Integer, nullable=False, default=0)
+    tasks_overdue = db.Column(db.Integer, nullable=False, default=0)
+    daily_reports = db.Column(db.Integer, nullable=False, default=0)
+    weekly_reports = db.Column(db.Integer, nullable=False, default=0)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    session_seconds = db.Column(db.Integer, nullable=False, default=0)
+    idle_seconds = db.Column(db.Integer, nullable=False, default=0)
+    score = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.admin_id,
+            "name": self.name,
+            "domain": self.domain,
+            # Fields the dashboard's mentor card reads.
+            "activity": f"{self.score}%",
+            "avatarSeed": self.name,
+            "score": self.score,
+            "members": self.members,
+            "tasks": {
+                "total": self.tasks_total,
+                "completed": self.tasks_completed,
+                "checked": self.tasks_checked,
+                "on_time": self.tasks_on_time,
+                "overdue": self.tasks_overdue,
+            },
+            "reports": {
+                "daily": self.daily_reports,
+                "weekly": self.weekly_reports,
+            },
+            "sessions": {
+                "count": self.sessions,
+                "active_seconds": max(self.session_seconds - self.idle_seconds, 0),
+                "idle_seconds": self.idle_seconds,
+            },
+            "refreshed_at": to_ist_iso(self.refreshed_at)
+        }
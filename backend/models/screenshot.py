@@ -0,0 +1,38 @@
+import os
+import string
+
+from models import db
+from utils.datetime_utils import now_ist, to_ist_iso
+
+
+def digest_from_path(path):
+    """Recover the content digest from a stored screenshot path, if it is one."""
+    digest = os.path.basename(path or "").split(".", 1)[0]
+    if len(digest) == 64 and all(char in string.hexdigits for char in digest):
+        return digest
+    return None
+
+
+class ScreenshotBlob(db.Model):
+    """One stored screenshot file, shared by every Activity whose image hashes to it."""
+    __tablename__ = "screenshot_blobs"
+
+    digest = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(255), nullable=False)
+    thumbnail_path = db.Column(db.String(255), nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(
+        db.DateTime,
+        default=now_ist
+    )
+
+    def to_dict(self):
+        return {
+            "digest": self.digest,
+            "size_bytes": self.size_bytes,
+            "ref_count": self.ref_count,
+            "has_thumbnail": bool(self.thumbnail_path),
+            "created_at": to_ist_iso(self.created_at)
+        }
@@ -0,0 +1,12 @@
+from . import db
+
+
+class TableVersion(db.Model):
+    """
+    Monotonic per-table write counter, bumped alongside every change event.
+    List endpoints derive their ETags from it (see utils/etag.py).
+    """
+    __tablename__ = 'table_versions'
+
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -1,4 +1,5 @@
 from . import db
+from utils.datetime_utils import now_ist_naive
 
 class Task(db.Model):
     __tablename__ = 'tasks'
@@ -13,6 +14,12 @@ class Task(db.Model):
     status = db.Column(db.String(20))
     createdAt = db.Column(db.String(50))
     isChecked = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=now_ist_naive, onupdate=now_ist_naive)
+
+    SERIALIZED_COLUMNS = (
+        "id", "title", "domain", "assignedTo", "userId", "deadline", "priority",
+        "description", "status", "createdAt", "isChecked",
+    )
 
     def to_dict(self):
         return {
@@ -0,0 +1,21 @@
+from . import db
+from utils.datetime_utils import now_ist_naive, to_ist_iso
+
+
+class Tombstone(db.Model):
+    """Records a deleted row so delta-sync clients can drop it locally."""
+    __tablename__ = 'tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    # String so it can hold report ids as well as integer keys; "*" means
+    # every row in the table was removed.
+    row_id = db.Column(db.String(50), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=now_ist_naive, index=True)
+
+    def to_dict(self):
+        return {
+            "table": self.table_name,
+            "id": self.row_id,
+            "deleted_at": to_ist_iso(self.deleted_at)
+        }
@@ -1,6 +1,7 @@
 # User Model
 from . import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.datetime_utils import now_ist_naive
+from utils.passwords import password_pool
 
 
 class User(db.Model):
@@ -14,13 +15,21 @@ class User(db.Model):
     domain = db.Column(db.String(50), default="")
     designation = db.Column(db.String(50), default="")
     status = db.Column(db.String(20), default="Offline")
+    # Bumped on every profile change so signed sessions can detect staleness.
+    profile_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(db.DateTime, default=now_ist_naive, onupdate=now_ist_naive)
 
     # 🔐 Secure password storage
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = password_pool.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return password_pool.verify(self.password, password)
+
+    SERIALIZED_COLUMNS = (
+        "id", "custom_id", "username", "email", "role", "domain", "designation",
+        "status",
+    )
 
     def to_dict(self):
         return {
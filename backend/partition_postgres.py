@@ -0,0 +1,93 @@
+"""
+One-time conversion (Postgres only): rebuild the activity and logs tables as
+monthly range partitions on created_at / login_time, so retention can drop
+whole months instead of deleting rows.
+Run ONCE with: python partition_postgres.py [activity|logs ...]
+Safe to run multiple times — tables that are already partitioned are skipped.
+
+Each table is copied into its new partitioned form inside one transaction
+that holds an exclusive lock on it, so run this in a maintenance window.
+Partitioned tables need the partition column in every unique key, so the
+primary key becomes (id, <time column>); ids still come from the table's
+original sequence and stay unique. Rows with no time value are given their
+updated_at (or now) because the partition column must be NOT NULL.
+"""
+import sys
+
+from sqlalchemy import inspect, text
+
+from app import app, initialize_database
+from migrations import available_migrations
+from models import db
+from utils.datetime_utils import now_ist_naive
+from utils.partitions import (
+    PARTITION_COLUMNS, add_months, create_monthly_partition, is_partitioned, month_start,
+)
+
+
+def partition_table(connection, table_name, column):
+    legacy = f"{table_name}_unpartitioned"
+    sequence = connection.execute(
+        text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table_name}
+    ).scalar()
+    primary_key = inspect(connection).get_pk_constraint(table_name)["name"]
+
+    connection.execute(text(f"LOCK TABLE {table_name} IN ACCESS EXCLUSIVE MODE"))
+    connection.execute(text(
+        f"UPDATE {table_name} SET {column} = COALESCE(updated_at, now()) WHERE {column} IS NULL"
+    ))
+    connection.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+    if primary_key:
+        connection.execute(text(f"ALTER TABLE {legacy} RENAME CONSTRAINT {primary_key} TO {legacy}_pkey"))
+
+    connection.execute(text(
+        f"CREATE TABLE {table_name} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING IDENTITY "
+        f"INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE ({column})"
+    ))
+    connection.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column} SET NOT NULL"))
+    connection.execute(text(f"ALTER TABLE {table_name} ADD PRIMARY KEY (id, {column})"))
+    connection.execute(text(f"CREATE TABLE {table_name}_default PARTITION OF {table_name} DEFAULT"))
+
+    oldest = connection.execute(text(f"SELECT min({column}) FROM {legacy}")).scalar()
+    last = add_months(month_start(now_ist_naive()), app.config["PARTITION_MONTHS_AHEAD"])
+    start = month_start(oldest) if oldest else month_start(now_ist_naive())
+    while start <= last:
+        create_monthly_partition(connection, table_name, start)
+        start = add_months(start, 1)
+
+    copied = connection.execute(text(f"INSERT INTO {table_name} SELECT * FROM {legacy}")).rowcount
+    if sequence:
+        # The serial sequence belongs to the old table; keep it when that goes.
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table_name}.id"))
+    connection.execute(text(f"DROP TABLE {legacy}"))
+    connection.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+        f"COALESCE((SELECT max(id) FROM {table_name}), 1))"
+    ))
+    return copied
+
+
+if __name__ == "__main__":
+    tables = sys.argv[1:] or list(PARTITION_COLUMNS)
+    initialize_database(app)
+
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            print("\n⏭️  Partitioning is Postgres-only; nothing to do.\n")
+            sys.exit(0)
+
+        print("\n🧱 Partitioning tables by month...")
+        with db.engine.begin() as connection:
+            for table_name in tables:
+                if is_partitioned(connection, table_name):
+                    print(f"  ⏭️  {table_name} — already partitioned, skipping")
+                    continue
+                copied = partition_table(connection, table_name, PARTITION_COLUMNS[table_name])
+                print(f"  ✅ {table_name} — {copied} row(s) moved into monthly partitions")
+
+            # Migrations are idempotent; rerunning them recreates the indexes
+            # that went with the old tables, now on the partitioned ones.
+            for _, module in available_migrations():
+                module.upgrade(connection)
+
+        print("\n✅ Done!\n")
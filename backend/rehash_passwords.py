@@ -2,10 +2,11 @@
 One-time migration: re-hash all plain-text passwords in admins/users tables.
 Run ONCE with: python rehash_passwords.py
 Safe to run multiple times — skips records already hashed.
+Hashing is spread over the PASSWORD_WORKERS process pool (utils/passwords.py).
 """
-from werkzeug.security import generate_password_hash
 from app import create_app
 from models import db, Admin, User
+from utils.passwords import password_pool
 
 app = create_app()
 
@@ -15,28 +16,25 @@ def is_already_hashed(pw: str) -> bool:
         return False
     return pw.startswith(("pbkdf2:", "scrypt:", "argon2:", "$"))
 
-with app.app_context():
-    updated = 0
-
-    print("\n🔒 Re-hashing Admin passwords...")
-    for admin in Admin.query.all():
-        if not is_already_hashed(admin.password):
-            plain = admin.password
-            admin.password = generate_password_hash(plain)
-            print(f"  ✅ Admin '{admin.username}' — hashed (was: '{plain}')")
-            updated += 1
+def rehash_all(model, label):
+    """Hash every plain-text password of ``model`` in one pooled batch."""
+    print(f"\n🔒 Re-hashing {label} passwords...")
+    pending = []
+    for row in model.query.all():
+        if not is_already_hashed(row.password):
+            pending.append(row)
         else:
-            print(f"  ⏭️  Admin '{admin.username}' — already hashed, skipping")
+            print(f"  ⏭️  {label} '{row.username}' — already hashed, skipping")
 
-    print("\n🔒 Re-hashing User passwords...")
-    for user in User.query.all():
-        if not is_already_hashed(user.password):
-            plain = user.password
-            user.password = generate_password_hash(plain)
-            print(f"  ✅ User '{user.username}' — hashed (was: '{plain}')")
-            updated += 1
-        else:
-            print(f"  ⏭️  User '{user.username}' — already hashed, skipping")
+    hashes = password_pool.hash_many([row.password for row in pending])
+    for row, hashed in zip(pending, hashes):
+        plain = row.password
+        row.password = hashed
+        print(f"  ✅ {label} '{row.username}' — hashed (was: '{plain}')")
+    return len(pending)
 
-    db.session.commit()
-    print(f"\n✅ Done! {updated} password(s) updated.\n")
+if __name__ == "__main__":
+    with app.app_context():
+        updated = rehash_all(Admin, "Admin") + rehash_all(User, "User")
+        db.session.commit()
+        print(f"\n✅ Done! {updated} password(s) updated.\n")
@@ -0,0 +1,158 @@
+import json
+from datetime import timedelta
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, func, or_, select
+
+from models import db, ActivityDaily, ActivityHourly, RollupState
+from auth_middleware import login_required
+from utils.datetime_utils import now_ist_naive, parse_client_datetime, parse_time_arg, to_ist_iso
+from utils.pagination import parse_limit
+
+activity_rollups_bp = Blueprint('activity_rollups', __name__)
+
+GRAINS = {"hour": ActivityHourly, "day": ActivityDaily}
+# Default window when ?from= is omitted.
+DEFAULT_SPAN = {"hour": timedelta(hours=24), "day": timedelta(days=7)}
+
+
+def _rollup_query_args():
+    grain = request.args.get("grain", "day")
+    if grain not in GRAINS:
+        raise ValueError("grain must be 'hour' or 'day'")
+
+    end = parse_time_arg(request.args.get("to"), "to") or now_ist_naive()
+    start = parse_time_arg(request.args.get("from"), "from") or end - DEFAULT_SPAN[grain]
+    if start > end:
+        raise ValueError("from must not be after to")
+    if grain == "day":
+        # Include the bucket of the day ?from= falls in.
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    username = (request.args.get("username") or "").strip() or None
+    return GRAINS[grain], grain, start, end, username
+
+
+def _refreshed_at():
+    state = db.session.get(RollupState, "activity_rollups")
+    return to_ist_iso(state.refreshed_at) if state else None
+
+
+def _parse_cursor(value):
+    """
+    Cursors are "<bucket_start>|<username>" of the previous page's last row,
+    the time as naive IST ISO so the cursor has no "+" to escape in a URL.
+    """
+    if not value:
+        return None
+    bucket_start, separator, username = value.partition("|")
+    parsed = parse_client_datetime(bucket_start)
+    if not separator or parsed is None:
+        raise ValueError("cursor is invalid")
+    return parsed.replace(tzinfo=None), username
+
+
+@activity_rollups_bp.route("/activity/rollups", methods=["GET"])
+@login_required
+def get_activity_rollups():
+    """
+    Per-user activity buckets from the rollup tables, never raw Activity rows.
+
+    ?grain=hour|day (default day), ?from=&to= (default the last day of hours
+    or week of days), optional ?username=, and ?limit=&cursor= keyset paging
+    in (bucket_start, username) order. Buckets trail live data by at most
+    ROLLUP_INTERVAL_SECONDS; ``refreshed_at`` says when they were last built.
+    """
+    try:
+        model, grain, start, end, username = _rollup_query_args()
+        limit = parse_limit(request.args.get("limit"))
+        cursor = _parse_cursor(request.args.get("cursor"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    try:
+        query = model.query.filter(model.bucket_start >= start, model.bucket_start <= end)
+        if username:
+            query = query.filter(model.username == username)
+        if cursor is not None:
+            cursor_start, cursor_username = cursor
+            query = query.filter(or_(
+                model.bucket_start > cursor_start,
+                and_(model.bucket_start == cursor_start, model.username > cursor_username),
+            ))
+
+        rows = query.order_by(model.bucket_start.asc(), model.username.asc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = (
+            f"{rows[-1].bucket_start.isoformat()}|{rows[-1].username}"
+            if has_more and rows else None
+        )
+
+        return jsonify({
+            "grain": grain,
+            "items": [row.to_dict() for row in rows],
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "refreshed_at": _refreshed_at(),
+        }), 200
+    except Exception:
+        return jsonify({"error": "Failed to fetch activity rollups."}), 500
+
+
+@activity_rollups_bp.route("/activity/rollups/totals", methods=["GET"])
+@login_required
+def get_activity_rollup_totals():
+    """
+    Per-user totals over a time range, summed from the rollup buckets.
+
+    Takes the same ?grain=&from=&to=&username= as /activity/rollups; use
+    grain=day for long ranges so the cost stays one row per user per day.
+    """
+    try:
+        model, grain, start, end, username = _rollup_query_args()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    summed = (
+        "events", "logins", "logouts", "idle_events", "app_usage_events",
+        "screenshots", "idle_seconds", "session_seconds",
+    )
+    try:
+        conditions = [model.bucket_start >= start, model.bucket_start <= end]
+        if username:
+            conditions.append(model.username == username)
+
+        totals = {}
+        for row in db.session.execute(
+            select(model.username, *(func.sum(getattr(model, column)) for column in summed))
+            .where(*conditions)
+            .group_by(model.username)
+        ).all():
+            totals[row[0]] = {
+                "username": row[0],
+                **{column: int(value or 0) for column, value in zip(summed, row[1:])},
+                "app_urls": set(),
+            }
+
+        # Distinct apps cannot be summed; union the per-bucket sets instead.
+        for bucket_username, app_urls in db.session.execute(
+            select(model.username, model.app_urls).where(*conditions, model.app_urls.isnot(None))
+        ).all():
+            if bucket_username in totals:
+                totals[bucket_username]["app_urls"].update(json.loads(app_urls))
+
+        items = []
+        for total in sorted(totals.values(), key=lambda item: item["username"]):
+            app_urls = sorted(total.pop("app_urls"))
+            items.append({**total, "distinct_apps": len(app_urls), "app_urls": app_urls})
+
+        return jsonify({
+            "grain": grain,
+            "from": to_ist_iso(start),
+            "to": to_ist_iso(end),
+            "items": items,
+            "refreshed_at": _refreshed_at(),
+        }), 200
+    except Exception:
+        return jsonify({"error": "Failed to fetch activity totals."}), 500
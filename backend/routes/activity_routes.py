@@ -1,54 +1,49 @@
-from flask import Blueprint, jsonify, request
-from models import db, Log, Activity, User, Admin
-from config import Config
-from utils.datetime_utils import now_ist, now_ist_iso, now_ist_naive, ensure_ist
-from datetime import datetime
+from flask import Blueprint, current_app, jsonify, request, session
+from sqlalchemy import select
+from models import db, Log, Activity
+from utils.datetime_utils import now_ist, parse_client_datetime, parse_time_arg
 import json
 import os
-import base64
-from auth_middleware import login_required
+from auth_middleware import login_required, role_required
+from utils.actor_cache import get_actor
+from utils.delta_sync import delta_response
+from utils.etag import conditional_list
+from utils.event_broker import publish_change
+from utils.presence import presence
+from utils.export import export_response, parse_export_format
+from utils.screenshot_ingest import ScreenshotTooLarge, screenshot_ingest, stream_screenshot
+from utils.screenshot_store import add_screenshot, release_screenshot
+from utils.serializers import serialize_query
 
 activity_bp = Blueprint('activity', __name__)
 
+# Actions whose Activity row carries the uploaded screenshot.
+SCREENSHOT_ACTIONS = {"login", "logout", "screenshot"}
+
 
 def get_actor_details(username, payload):
-    actor = None
-    if username:
-        actor = Admin.query.filter_by(username=username).first() or User.query.filter_by(username=username).first()
+    actor = get_actor(username)
 
     return {
-        "email": payload.get("email") or (actor.email if actor else "system@gmail.com"),
-        "domain": payload.get("domain") or (actor.domain if actor else "Agent"),
-        "role": payload.get("role") or (actor.role if actor else "User"),
-        "designation": payload.get("designation") or (actor.designation if actor else ""),
+        "email": payload.get("email") or (actor["email"] if actor else "system@gmail.com"),
+        "domain": payload.get("domain") or (actor["domain"] if actor else "Agent"),
+        "role": payload.get("role") or (actor["role"] if actor else "User"),
+        "designation": payload.get("designation") or (actor["designation"] if actor else ""),
     }
 
 
-def parse_client_datetime(value):
-    if not value:
-        return None
-
-    if isinstance(value, datetime):
-        return ensure_ist(value)
-
-    text = str(value).strip()
-    if not text or text.upper() == "NULL":
-        return None
+def find_open_session(username):
+    return Log.query.filter(
+        Log.username == username,
+        Log.logout_time == None
+    ).order_by(Log.id.desc()).first()
 
-    normalized = text.replace(" ", "T")
 
+def parse_idle_seconds(duration):
     try:
-        return ensure_ist(datetime.fromisoformat(normalized))
-    except ValueError:
-        pass
-
-    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
-        try:
-            return ensure_ist(datetime.strptime(text, fmt))
-        except ValueError:
-            continue
-
-    return None
+        return max(int(float(duration)), 0)
+    except (TypeError, ValueError):
+        return 0
 
 
 def get_event_time(metadata, *keys):
@@ -61,41 +56,137 @@ def get_event_time(metadata, *keys):
 
 @activity_bp.route("/activity", methods=["GET"])
 @login_required
+@conditional_list("activity")
 def get_activity():
     try:
-        activities = Activity.query.order_by(Activity.id.desc()).all()
-        return jsonify([activity.to_dict() for activity in activities]), 200
+        if "since" in request.args:
+            return delta_response(Activity.query, Activity, "activity", request.args["since"])
+        return jsonify(serialize_query(Activity, Activity.query.order_by(Activity.id.desc()))), 200
     except Exception:
         return jsonify({"error": "Failed to fetch activity."}), 500
 
 
-@activity_bp.route("/activity", methods=["POST", "PATCH"])
-def save_activity():
-    data = request.json or {}
-    print("Incoming Activity:", data)
+# Output name -> column written by GET /activity/export, in output order.
+ACTIVITY_EXPORT_COLUMNS = {
+    "id": Activity.id,
+    "username": Activity.username,
+    "action": Activity.action,
+    "login_time": Activity.login_time,
+    "logout_time": Activity.logout_time,
+    "idle_time": Activity.idle_time,
+    "screenshot_path": Activity.screenshot_path,
+    "app_url": Activity.app_url,
+    "metadata": Activity.activity_metadata,
+    "created_at": Activity.created_at,
+}
 
-    username = data.get("username")
-    action = data.get("action")
-    metadata = data.get("metadata") or {}
 
+@activity_bp.route("/activity/export", methods=["GET"])
+@login_required
+@role_required("superadmin", "admin")
+def export_activity():
+    """
+    Stream activity rows as NDJSON (default) or CSV (?format=csv), oldest
+    first, filtered by ?username=, ?action= and a created_at range ?from=&to=.
+    """
     try:
-        screenshot_data = metadata.get("screenshot") or data.get("screenshot")
-        file_path = None
+        export_format = parse_export_format(request.args.get("format"))
+        created_from = parse_time_arg(request.args.get("from"), "from")
+        created_to = parse_time_arg(request.args.get("to"), "to")
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    statement = select(*ACTIVITY_EXPORT_COLUMNS.values()).order_by(Activity.id.asc())
+    username = (request.args.get("username") or "").strip()
+    if username:
+        statement = statement.where(Activity.username == username)
+    action = (request.args.get("action") or "").strip()
+    if action:
+        statement = statement.where(Activity.action == action)
+    if created_from is not None:
+        statement = statement.where(Activity.created_at >= created_from)
+    if created_to is not None:
+        statement = statement.where(Activity.created_at <= created_to)
 
-        if screenshot_data:
-            image_bytes = base64.b64decode(screenshot_data)
-            os.makedirs(Config.SCREENSHOT_FOLDER, exist_ok=True)
-            filename = f"{username}_{int(now_ist().timestamp())}.png"
-            file_path = os.path.join(Config.SCREENSHOT_FOLDER, filename)
+    return export_response(statement, tuple(ACTIVITY_EXPORT_COLUMNS), export_format, "activity")
 
-            with open(file_path, "wb") as f:
-                f.write(image_bytes)
+
+@activity_bp.route("/activity/ingest-stats", methods=["GET"])
+@login_required
+@role_required("superadmin", "admin")
+def get_ingest_stats():
+    """Screenshot ingest queue depth and counters for this worker process."""
+    return jsonify(screenshot_ingest.stats()), 200
+
+
+_UNSET = object()
+
+
+class ActivityEventWriter:
+    """
+    Applies agent events to the session as one unit of work.
+
+    Open sessions and open idle rows are resolved from the database at most
+    once per username and then tracked in memory, so an idle_start/idle_end
+    pair (or a login followed by a logout) inside one batch is paired
+    without a query. New rows are collected and added together so the
+    flush can batch the INSERTs. Nothing is committed here.
+    """
+
+    def __init__(self):
+        self.new_rows = []
+        self.screenshot_jobs = []
+        self._open_sessions = {}
+        self._open_idles = {}
+        self._idle_increments = {}
+        self.changed_topics = set()
+        # Users whose agents were heard from, for presence heartbeats.
+        self.seen_usernames = set()
+
+    def heartbeat(self):
+        """
+        Count the batch as a presence heartbeat, but only for the logged-in
+        caller: agent uploads carry no credentials, so a bare username in
+        the body must not keep anyone Online.
+        """
+        username = session.get("username")
+        if username and username in self.seen_usernames:
+            presence.heartbeat(username)
+
+    def open_session(self, username):
+        session_log = self._open_sessions.get(username, _UNSET)
+        if session_log is _UNSET:
+            session_log = find_open_session(username)
+            self._open_sessions[username] = session_log
+        return session_log
+
+    def open_idle(self, username):
+        idle_activity = self._open_idles.get(username, _UNSET)
+        if idle_activity is _UNSET:
+            idle_activity = Activity.query.filter(
+                Activity.username == username,
+                Activity.action == "idle",
+                Activity.idle_time == None
+            ).order_by(Activity.id.desc()).first()
+            self._open_idles[username] = idle_activity
+        return idle_activity
+
+    def _add(self, row):
+        self.new_rows.append(row)
+        return row
+
+    def apply(self, data):
+        """Apply one event payload. Returns "applied" or "ignored"."""
+        username = data.get("username")
+        action = data.get("action")
+        metadata = data.get("metadata") or {}
+        activity = None
 
         if action == "login":
             actor_details = get_actor_details(username, data)
             login_time = get_event_time(metadata, "login_time", "timestamp")
 
-            new_log = Log(
+            new_log = self._add(Log(
                 username=username,
                 login_time=login_time.replace(tzinfo=None),
                 logout_time=None,
@@ -103,44 +194,42 @@ def save_activity():
                 domain=actor_details["domain"],
                 role=actor_details["role"],
                 designation=actor_details["designation"],
-                action="login"
-            )
-            db.session.add(new_log)
+                action="login",
+                idle_seconds=0
+            ))
+            self._open_sessions[username] = new_log
+            self.changed_topics.add("logs")
 
-            activity = Activity(
+            activity = self._add(Activity(
                 username=username,
                 action="login",
                 login_time=login_time,
-                screenshot_path=file_path,
                 created_at=login_time
-            )
-            db.session.add(activity)
+            ))
 
         elif action == "logout":
             logout_time = get_event_time(metadata, "logout_time", "timestamp")
 
-            last_login = Log.query.filter(
-                Log.username == username,
-                Log.logout_time == None
-            ).order_by(Log.id.desc()).first()
+            last_login = self.open_session(username)
 
             if last_login:
                 last_login.logout_time = logout_time.replace(tzinfo=None)
                 last_login.action = "logout"
+                self.changed_topics.add("logs")
+                # The next-most-recent open session (if any) is now current.
+                self._open_sessions.pop(username, None)
 
-            activity = Activity(
+            activity = self._add(Activity(
                 username=username,
                 action="logout",
                 logout_time=logout_time,
                 idle_time=metadata.get("idle_time"),
-                screenshot_path=file_path,
                 created_at=logout_time
-            )
-            db.session.add(activity)
+            ))
 
         elif action == "idle_start":
             idle_start = get_event_time(metadata, "idle_start", "timestamp")
-            idle_activity = Activity(
+            idle_activity = self._add(Activity(
                 username=username,
                 action="idle",
                 idle_time=None,
@@ -148,8 +237,8 @@ def save_activity():
                     "idle_start": idle_start.isoformat()
                 }),
                 created_at=idle_start
-            )
-            db.session.add(idle_activity)
+            ))
+            self._open_idles[username] = idle_activity
 
         elif action == "idle_end":
             duration = data.get("duration")
@@ -159,11 +248,7 @@ def save_activity():
             idle_start = metadata.get("idle_start")
             idle_end = get_event_time(metadata, "idle_end", "timestamp")
 
-            last_idle = Activity.query.filter(
-                Activity.username == username,
-                Activity.action == "idle",
-                Activity.idle_time == None
-            ).order_by(Activity.id.desc()).first()
+            last_idle = self.open_idle(username)
 
             payload_metadata = json.dumps({
                 "idle_start": idle_start,
@@ -175,43 +260,313 @@ def save_activity():
                 last_idle.idle_time = duration
                 last_idle.activity_metadata = payload_metadata
                 last_idle.created_at = idle_end
+                self._open_idles.pop(username, None)
             else:
-                activity = Activity(
+                self._add(Activity(
                     username=username,
                     action="idle",
                     idle_time=duration,
                     activity_metadata=payload_metadata,
                     created_at=idle_end
+                ))
+
+            idle_seconds = parse_idle_seconds(duration)
+            open_session = self.open_session(username) if idle_seconds else None
+            if open_session:
+                self._idle_increments[open_session] = (
+                    self._idle_increments.get(open_session, 0) + idle_seconds
                 )
-                db.session.add(activity)
+                self.changed_topics.add("logs")
 
         elif action == "app_usage":
             event_time = get_event_time(metadata, "timestamp")
-            activity = Activity(
+            self._add(Activity(
                 username=username,
                 action="app_usage",
                 app_url=data.get("app_url") or metadata.get("app_url"),
                 created_at=event_time
-            )
-            db.session.add(activity)
+            ))
 
         elif action == "screenshot":
             event_time = get_event_time(metadata, "timestamp")
+            activity = self._add(Activity(
+                username=username,
+                action="screenshot",
+                created_at=event_time
+            ))
+
+        else:
+            return "ignored"
+
+        self.changed_topics.add("activity")
+        if action != "logout":
+            self.seen_usernames.add(username)
+
+        screenshot_data = metadata.get("screenshot") or data.get("screenshot")
+        if screenshot_data and activity is not None:
+            self.screenshot_jobs.append((activity, screenshot_data))
+        return "applied"
+
+    def flush(self):
+        """
+        Add collected rows, apply idle totals and publish one change event per
+        affected topic. Returns the spooled activity ids.
+        """
+        for session_log, idle_seconds in self._idle_increments.items():
+            if session_log.id is None:
+                session_log.idle_seconds = (session_log.idle_seconds or 0) + idle_seconds
+            else:
+                # Expression update so concurrent idle_end events don't lose increments.
+                session_log.idle_seconds = Log.idle_seconds + idle_seconds
+
+        db.session.add_all(self.new_rows)
+        for topic in sorted(self.changed_topics):
+            publish_change(topic, "changed")
+        if not self.screenshot_jobs:
+            return []
+
+        # Flush for activity ids; spool files are keyed on them and the ingest
+        # workers fill in screenshot_path once the PNG is written.
+        db.session.flush()
+        spooled = []
+        try:
+            for activity, screenshot_data in self.screenshot_jobs:
+                screenshot_ingest.spool(activity.id, screenshot_data)
+                spooled.append(activity.id)
+        except Exception:
+            discard_spooled(spooled)
+            raise
+        return spooled
+
+
+def discard_spooled(activity_ids):
+    for activity_id in activity_ids:
+        spool_path = screenshot_ingest.spool_path(activity_id)
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+
+
+def _count_screenshots(events):
+    return sum(
+        1 for event in events
+        if isinstance(event, dict)
+        and event.get("action") in SCREENSHOT_ACTIONS
+        and ((event.get("metadata") or {}).get("screenshot") or event.get("screenshot"))
+    )
+
+
+def _screenshot_queue_full():
+    screenshot_ingest.reject()
+    return jsonify({
+        "success": False,
+        "error": "Screenshot queue is full. Please retry shortly."
+    }), 503, {"Retry-After": "5"}
+
+
+@activity_bp.route("/activity", methods=["POST", "PATCH"])
+def save_activity():
+    data = request.json or {}
+
+    # Don't echo multi-megabyte base64 screenshots into the worker's stdout.
+    print("Incoming Activity:", {"username": data.get("username"), "action": data.get("action")})
+
+    reserved = _count_screenshots([data])
+    if reserved and not screenshot_ingest.reserve(reserved):
+        return _screenshot_queue_full()
+
+    spooled = []
+
+    try:
+        writer = ActivityEventWriter()
+        writer.apply(data)
+        spooled = writer.flush()
+        db.session.commit()
+        writer.heartbeat()
+
+        if spooled:
+            screenshot_ingest.submit(spooled[0], reserved=True)
+            reserved -= 1
+            return jsonify({"success": True, "screenshot": "queued"}), 202
+        return jsonify({"success": True}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        discard_spooled(spooled)
+        print("ERROR:", e)
+        return jsonify({
+            "success": False,
+            "error": "An internal error occurred. Please try again."
+        }), 500
+    finally:
+        screenshot_ingest.release(reserved)
+
+
+@activity_bp.route("/activity/batch", methods=["POST"])
+def save_activity_batch():
+    """
+    Apply an ordered array of agent events in one transaction.
+
+    Body: {"username": "...", "events": [{"action": ..., "metadata": {...}}, ...]}.
+    Events inherit the top-level username unless they carry their own. The
+    response lists one result per event, in order; the batch is all-or-nothing.
+    """
+    data = request.json or {}
+    events = data.get("events")
+    if not isinstance(events, list) or not events:
+        return jsonify({"success": False, "error": "events must be a non-empty array"}), 400
+
+    max_events = current_app.config["ACTIVITY_BATCH_MAX_EVENTS"]
+    if len(events) > max_events:
+        return jsonify({
+            "success": False,
+            "error": f"A batch may contain at most {max_events} events"
+        }), 413
+
+    default_username = data.get("username")
+    print("Incoming Activity batch:", {"username": default_username, "events": len(events)})
+
+    # Every screenshot in the batch needs a queue slot, held from before the
+    # commit so a 202 never leaves files stranded in the spool.
+    reserved = _count_screenshots(events)
+    if reserved and not screenshot_ingest.reserve(reserved):
+        return _screenshot_queue_full()
+
+    results = []
+    spooled = []
+
+    try:
+        writer = ActivityEventWriter()
+        for index, event in enumerate(events):
+            if not isinstance(event, dict):
+                results.append({"index": index, "status": "error", "error": "Event must be an object"})
+                continue
+
+            event = dict(event)
+            event.setdefault("username", default_username)
+            if not event.get("username"):
+                results.append({"index": index, "status": "error", "error": "username is required"})
+                continue
+
+            status = writer.apply(event)
+            results.append({"index": index, "action": event.get("action"), "status": status})
+
+        spooled = writer.flush()
+        db.session.commit()
+        writer.heartbeat()
+
+        for activity_id in spooled:
+            screenshot_ingest.submit(activity_id, reserved=reserved > 0)
+            reserved = max(0, reserved - 1)
+
+        return jsonify({
+            "success": True,
+            "applied": sum(1 for result in results if result["status"] == "applied"),
+            "results": results
+        }), 202 if spooled else 200
+
+    except Exception as e:
+        db.session.rollback()
+        discard_spooled(spooled)
+        print("ERROR:", e)
+        return jsonify({
+            "success": False,
+            "error": "An internal error occurred. Please try again."
+        }), 500
+    finally:
+        screenshot_ingest.release(reserved)
+
+
+@activity_bp.route("/activity/screenshot", methods=["POST"])
+def upload_screenshot():
+    """
+    Binary screenshot upload for desktop agents.
+
+    Takes the PNG as the raw request body, or as a multipart "screenshot"
+    file, and streams it to disk in chunks. Pass ?activity_id= to attach it to
+    an existing activity row (e.g. a login) of the same ?username=; otherwise
+    a new "screenshot" activity is recorded for ?username= at ?timestamp=.
+    """
+    max_bytes = current_app.config["SCREENSHOT_MAX_BYTES"]
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({"success": False, "error": "Screenshot is too large"}), 413
+
+    upload = request.files.get("screenshot") if request.mimetype == "multipart/form-data" else None
+    params = request.form if upload is not None else request.args
+    stream = upload.stream if upload is not None else request.stream
+
+    username = params.get("username") or request.args.get("username")
+    activity_id = params.get("activity_id") or request.args.get("activity_id")
+    if not username:
+        return jsonify({"success": False, "error": "username is required"}), 400
+    if activity_id and not str(activity_id).isdigit():
+        return jsonify({"success": False, "error": "activity_id must be an integer"}), 400
+
+    folder = current_app.config["SCREENSHOT_FOLDER"]
+    tmp_path = None
+
+    try:
+        # Land the bytes on disk before opening a transaction so a slow upload
+        # never holds a database write lock.
+        tmp_path, digest, size_bytes = stream_screenshot(folder, stream, max_bytes)
+
+        if activity_id:
+            # The endpoint has no session, so an agent may only replace the
+            # screenshot of its own user's activity rows.
+            activity = Activity.query.get(int(activity_id))
+            if activity is None or activity.username != username:
+                os.remove(tmp_path)
+                return jsonify({"success": False, "error": "Activity not found"}), 404
+        else:
+            event_time = parse_client_datetime(
+                params.get("timestamp") or request.args.get("timestamp")
+            ) or now_ist()
             activity = Activity(
                 username=username,
                 action="screenshot",
-                screenshot_path=file_path,
                 created_at=event_time
             )
             db.session.add(activity)
 
+        if activity.screenshot_path:
+            release_screenshot(activity.screenshot_path)
+
+        file_path = add_screenshot(
+            folder,
+            digest,
+            tmp_path,
+            size_bytes,
+            current_app.config["SCREENSHOT_THUMBNAIL_SIZE"],
+        )
+        tmp_path = None
+        activity.screenshot_path = file_path
+        db.session.flush()
+        publish_change("activity", "updated", activity.id)
         db.session.commit()
-        return jsonify({"success": True}), 200
 
+        return jsonify({
+            "success": True,
+            "activity_id": activity.id,
+            "screenshot_path": file_path
+        }), 201
+
+    except ScreenshotTooLarge:
+        db.session.rollback()
+        return jsonify({"success": False, "error": "Screenshot is too large"}), 413
+    except ValueError as exc:
+        db.session.rollback()
+        _discard_upload(tmp_path)
+        return jsonify({"success": False, "error": str(exc)}), 400
     except Exception as e:
         db.session.rollback()
+        _discard_upload(tmp_path)
         print("ERROR:", e)
         return jsonify({
             "success": False,
             "error": "An internal error occurred. Please try again."
         }), 500
+
+
+def _discard_upload(*paths):
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -1,34 +1,37 @@
 from flask import Blueprint, request, jsonify, session
-import datetime
 import os
 from models import db, Admin, Log
 from auth_middleware import login_required, role_required
+from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
+from utils.actor_cache import invalidate_actor
+from utils.principals import invalidate_profile_version
+from utils.delta_sync import delta_response, record_deletion
+from utils.etag import conditional_list
+from utils.event_broker import publish_change
+from utils.bulk_import import import_response
+from utils.custom_ids import admin_id_prefix, reserve_custom_ids
+from utils.passwords import PasswordPoolBusy
+from utils.serializers import serialize_query
 
 admins_bp = Blueprint('admins', __name__)
 
 def generate_admin_id(role):
     """Generates a custom ID for admin roles."""
-    prefix = {
-        'superadmin': 'SA',
-        'admin': 'AD',
-        'mentor': 'MT'
-    }.get(role.lower(), 'AD')
-
-    count = Admin.query.filter(Admin.role.ilike(role)).count()
-    year_short = datetime.datetime.now().strftime("%y")
-    return f"{prefix}/IN/{year_short}/{str(count + 1).zfill(4)}"
+    return reserve_custom_ids(Admin, admin_id_prefix(role), 1)[0]
 
 @admins_bp.route("/admins", methods=["GET"])
 @login_required
+@conditional_list("admins")
 def get_admins():
     """Get all admins, optionally filtered by role."""
     role_filter = request.args.get("role")
     query = Admin.query
     if role_filter:
         query = query.filter(Admin.role.ilike(f"%{role_filter}%"))
-    admins = query.all()
-    return jsonify([admin.to_dict() for admin in admins])
+    if "since" in request.args:
+        return delta_response(query, Admin, "admins", request.args["since"])
+    return jsonify(serialize_query(Admin, query))
 
 @admins_bp.route("/admins", methods=["POST"])
 @login_required
@@ -45,7 +48,6 @@ def create_admin():
         if designation and designation.lower() == "mentor":
             role = "mentor"
 
-        custom_id = data.get("adminId") or generate_admin_id(role)
         username = (data.get("username") or data.get("fullName") or "").strip()
         email = (data.get("email") or "").strip()
         domain = (data.get("Domain") or data.get("domain") or "").strip()
@@ -60,8 +62,10 @@ def create_admin():
         if not password or len(password) < 6:
             return jsonify({"error": "A password of at least 6 characters is required"}), 400
 
+        if Admin.query.filter(or_(Admin.username == username, Admin.email == email)).first():
+            return jsonify({"error": "Username or email already exists"}), 409
+
         new_admin = Admin(
-            custom_id=custom_id,
             username=username,
             email=email,
             role=role,
@@ -70,18 +74,34 @@ def create_admin():
             status=data.get("status", "Offline")
         )
         new_admin.set_password(password)
+        # Reserved last, so a request rejected above does not use up a number.
+        new_admin.custom_id = data.get("adminId") or generate_admin_id(role)
         db.session.add(new_admin)
+        db.session.flush()
+        publish_change("admins", "created", new_admin.id)
         db.session.commit()
+        invalidate_actor(new_admin.username)
         return jsonify(new_admin.to_dict()), 201
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Username or email already exists"}), 409
+    except PasswordPoolBusy:
+        db.session.rollback()
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as exc:
         db.session.rollback()
         print(f"create_admin failed: {exc}")
         return jsonify({"error": "Failed to create admin. Please try again."}), 500
 
 
+@admins_bp.route("/admins/import", methods=["POST"])
+@login_required
+@role_required("superadmin", "admin")
+def import_admins():
+    """Create admins in bulk from a CSV or JSON upload."""
+    return import_response(Admin, "admin")
+
+
 @admins_bp.route("/admins/<int:admin_id>", methods=["PUT"])
 @login_required
 @role_required("superadmin", "admin")
@@ -94,6 +114,7 @@ def update_admin(admin_id):
     data = request.json
     if not data:
         return jsonify({"error": "Request body is required"}), 400
+    previous_username = admin.username
     try:
         if "adminId" in data: admin.custom_id = data["adminId"]
         if "fullName" in data and data["fullName"].strip(): admin.username = data["fullName"].strip()
@@ -107,11 +128,18 @@ def update_admin(admin_id):
                 admin.role = "mentor"
         if "status" in data: admin.status = data["status"]
 
+        admin.profile_version = Admin.profile_version + 1
+        publish_change("admins", "updated", admin_id)
         db.session.commit()
+        invalidate_actor(previous_username, admin.username)
+        invalidate_profile_version("admin", admin_id)
         return jsonify(admin.to_dict()), 200
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Username or email already exists"}), 409
+    except PasswordPoolBusy:
+        db.session.rollback()
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as exc:
         db.session.rollback()
         print(f"update_admin failed: {exc}")
@@ -128,8 +156,12 @@ def delete_admin(admin_id):
         return jsonify({"error": "Admin not found"}), 404
 
     try:
+        username_to_delete = admin.username
         db.session.delete(admin)
+        record_deletion("admins", admin_id)
         db.session.commit()
+        invalidate_actor(username_to_delete)
+        invalidate_profile_version("admin", admin_id)
         return jsonify({"success": True, "message": "Admin deleted successfully"}), 200
     except Exception:
         db.session.rollback()
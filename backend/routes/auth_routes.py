@@ -1,16 +1,42 @@
 from flask import Blueprint, request, jsonify, session
-from models import db, Admin, User, Log
-from sqlalchemy import or_
+from models import db, Log
+from auth_middleware import login_required, role_required
 from utils.datetime_utils import now_ist_naive
+from utils.event_broker import publish_change
+from utils.passwords import PasswordPoolBusy, password_pool
+from utils.presence import presence
+from utils.principals import (
+    Principal,
+    current_profile_version,
+    find_principal,
+    find_principal_by_username,
+    get_principal,
+    session_snapshot,
+    upgrade_password_hash,
+)
 
 auth_bp = Blueprint('auth_bp', __name__)
 
+
+def password_pool_busy():
+    """503 for logins shed while the password hashing pool is saturated."""
+    response = jsonify({"success": False, "message": "Server is busy, please try again shortly"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """
-    Handles login for ALL users — checks Admin table first, then User table.
-    Default app-wide rate limits are enforced by Flask-Limiter.
+    Handles login for ALL users — resolves Admin or User in a single query,
+    preferring Admin when both match. Default app-wide rate limits are
+    enforced by Flask-Limiter. Password checks run in the bounded KDF pool
+    (utils/passwords.py); when it is full the login is answered 503 before
+    touching the database.
     """
+    if password_pool.is_saturated():
+        password_pool.reject()
+        return password_pool_busy()
 
     data = request.get_json()
     if not data:
@@ -22,39 +48,35 @@ def login():
     if not identifier or not password:
         return jsonify({"success": False, "message": "Username and password are required"}), 400
 
-    # Search Admin table by username OR email
-    user = Admin.query.filter(
-        or_(Admin.username == identifier, Admin.email == identifier)
-    ).first()
-
-    # Fall back to User table
-    if not user:
-        user = User.query.filter(
-            or_(User.username == identifier, User.email == identifier)
-        ).first()
+    user = find_principal(identifier)
+    try:
+        verified = bool(user) and user.check_password(password)
+    except PasswordPoolBusy:
+        return password_pool_busy()
 
-    if user and user.check_password(password):
+    if verified:
         try:
-            user.status = "Online"
+            upgrade_password_hash(user, password)
             new_log = Log(
                 login_time=now_ist_naive(),
                 username=user.username,
                 email=user.email,
-                domain=getattr(user, 'domain', 'N/A'),
+                domain=user.domain,
                 role=user.role,
-                designation=getattr(user, 'designation', 'N/A'),
+                designation=user.designation,
                 action="User Logged In"
             )
             
             db.session.add(new_log)
+            db.session.flush()
+            publish_change("logs", "created", new_log.id)
             db.session.commit()
+            presence.login(user)
 
             # Reset and re-issue the authenticated session cookie explicitly.
             session.clear()
             session.permanent = True
-            session["user_id"] = user.id
-            session["username"] = user.username
-            session["role"] = user.role
+            _store_principal(user)
             session.modified = True
 
             return jsonify({
@@ -69,30 +91,59 @@ def login():
 
     return jsonify({"success": False, "message": "Invalid username or password"}), 401
 
+def _store_principal(user):
+    session["user_id"] = user.id
+    session["kind"] = user.kind
+    session["username"] = user.username
+    session["role"] = user.role
+    session["principal"] = session_snapshot(user)
+
+
 @auth_bp.route('/session', methods=['GET'])
 def get_session():
     """
     Verifies if a user session is active and returns user data.
+
+    Answers from the principal snapshot in the signed cookie. The only
+    check is the principal's profile_version, served from a short-lived
+    in-process cache, so most calls never touch the database. A changed
+    version refreshes the snapshot; a deleted principal ends the session.
     """
     user_id = session.get("user_id")
     if not user_id:
         return jsonify({"authenticated": False, "message": "No active session"}), 401
-    
-    user = Admin.query.get(user_id) or User.query.get(user_id)
-    
+
+    snapshot = session.get("principal")
+    if snapshot:
+        version = current_profile_version(snapshot["kind"], snapshot["id"])
+        if version == snapshot["profile_version"]:
+            user_data = {
+                key: value for key, value in snapshot.items()
+                if key not in ("kind", "profile_version")
+            }
+            presence.heartbeat(snapshot["username"])
+            return jsonify({"authenticated": True, "user": user_data}), 200
+        user = get_principal(snapshot["kind"], snapshot["id"]) if version is not None else None
+    else:
+        # Sessions issued before snapshots (or "kind") fall back to a lookup.
+        user = get_principal(session.get("kind"), user_id)
+
     if not user:
         session.clear()
         return jsonify({"authenticated": False, "message": "User not found"}), 401
-    
-    return jsonify({
-        "authenticated": True,
-        "user": user.to_dict()
-    }), 200
+
+    _store_principal(user)
+    presence.heartbeat(user.username)
+    user_data = {
+        key: value for key, value in session["principal"].items()
+        if key not in ("kind", "profile_version")
+    }
+    return jsonify({"authenticated": True, "user": user_data}), 200
 
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
     """
-    Handles user logout, updates status, and clears session.
+    Handles user logout, closes the session log, and clears session.
     """
     try:
         username = session.get("username")
@@ -102,20 +153,24 @@ def logout():
             username = request.json.get("username")
 
         if username:
-            user = Admin.query.filter_by(username=username).first() or \
-                   User.query.filter_by(username=username).first()
+            if session.get("kind") and session.get("user_id"):
+                user = Principal(session["kind"], id=session["user_id"], username=username)
+            else:
+                user = find_principal_by_username(username)
 
             if user:
-                user.status = "Offline"
                 last_log = Log.query.filter_by(username=user.username)\
                                     .filter(Log.logout_time == None)\
                                     .order_by(Log.id.desc())\
                                     .first()
-                
+
                 if last_log:
                     last_log.logout_time = now_ist_naive()
                     last_log.action = "User Session Completed"
-                    db.session.commit()
+                    publish_change("logs", "updated", last_log.id)
+
+                db.session.commit()
+                presence.logout(user)
 
         session.clear()
         return jsonify({"success": True, "message": "Logged out successfully"}), 200
@@ -123,3 +178,11 @@ def logout():
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": "Server error during logout"}), 500
+
+
+@auth_bp.route('/password-pool/stats', methods=['GET'])
+@login_required
+@role_required("superadmin", "admin")
+def get_password_pool_stats():
+    """Password hashing pool load and shed counters for this worker process."""
+    return jsonify(password_pool.stats()), 200
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import func, select
+
+from models import db, Admin, User, Log, Activity, DailyReport, WeeklyReport
+from auth_middleware import login_required, role_required
+from config import Config
+from utils.datetime_utils import now_ist_naive, to_ist_iso
+from utils.etag import table_versions
+from utils.ttl_cache import TTLCache
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# Tables the summary reads; a write to any of them changes the cache key.
+# Agents write activity rows constantly, so activity_today is left out of
+# the key and only refreshed by the TTL.
+SUMMARY_TABLES = ("users", "admins", "logs", "daily_reports", "weekly_reports")
+MAX_SUMMARY_DAYS = 90
+
+summary_cache = TTLCache(ttl=Config.DASHBOARD_CACHE_TTL, max_size=64)
+
+
+def _grouped_counts(column, *conditions):
+    statement = select(column, func.count()).group_by(column)
+    if conditions:
+        statement = statement.where(*conditions)
+    return {
+        (key if key is not None else ""): count
+        for key, count in db.session.execute(statement).all()
+    }
+
+
+def _user_summary():
+    by_status = _grouped_counts(User.status)
+    total = sum(by_status.values())
+    online = by_status.get("Online", 0)
+    return {
+        "total": total,
+        "online": online,
+        # Same figure the dashboard has always shown as "productivity".
+        "online_percent": round(online / total * 100) if total else 0,
+        "by_role": _grouped_counts(User.role),
+        "by_status": by_status,
+        "by_domain": _grouped_counts(User.domain),
+    }
+
+
+def _admin_summary():
+    return {
+        "by_role": _grouped_counts(func.lower(Admin.role)),
+        "by_status": _grouped_counts(Admin.status),
+    }
+
+
+def _report_summary(model):
+    by_status = _grouped_counts(model.status)
+    return {"total": sum(by_status.values()), "by_status": by_status}
+
+
+def _latest_user_sessions():
+    """Latest login/logout per end user, as the users table view shows them."""
+    rows = db.session.execute(
+        select(Log.username, func.max(Log.login_time), func.max(Log.logout_time))
+        .where(func.lower(Log.role) == "user", Log.username.isnot(None))
+        .group_by(Log.username)
+    ).all()
+    return {
+        username: {
+            "login_time": to_ist_iso(login_time),
+            "logout_time": to_ist_iso(logout_time),
+        }
+        for username, login_time, logout_time in rows
+    }
+
+
+def _idle_by_day(start):
+    login_day = func.date(Log.login_time)
+    rows = db.session.execute(
+        select(login_day, func.count(), func.coalesce(func.sum(Log.idle_seconds), 0))
+        .where(Log.login_time >= start, func.lower(Log.role) == "user")
+        .group_by(login_day)
+        .order_by(login_day)
+    ).all()
+    return [
+        {"date": str(day), "sessions": sessions, "idle_seconds": int(idle_seconds)}
+        for day, sessions, idle_seconds in rows
+    ]
+
+
+def _activity_today(start_of_day):
+    return _grouped_counts(Activity.action, Activity.created_at >= start_of_day)
+
+
+def build_summary(days):
+    now = now_ist_naive()
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "generated_at": to_ist_iso(now),
+        "days": days,
+        "users": _user_summary(),
+        "admins": _admin_summary(),
+        "daily_reports": _report_summary(DailyReport),
+        "weekly_reports": _report_summary(WeeklyReport),
+        "user_sessions": _latest_user_sessions(),
+        "idle_by_day": _idle_by_day(start_of_day - timedelta(days=days - 1)),
+        "activity_today": _activity_today(start_of_day),
+    }
+
+
+@dashboard_bp.route("/dashboard/summary", methods=["GET"])
+@login_required
+@role_required("superadmin", "admin", "mentor")
+def get_dashboard_summary():
+    """
+    Counts, status breakdowns and idle totals for the admin dashboard,
+    computed with a handful of GROUP BY queries instead of shipping every
+    list to the browser. ?days= (default 7) sets the idle_by_day window.
+
+    Results are cached per worker, keyed on the version of every table read
+    except activity, so a tracked write to those yields a fresh summary on
+    the next call; activity_today lags by at most DASHBOARD_CACHE_TTL.
+    """
+    try:
+        days = int(request.args.get("days", 7))
+    except ValueError:
+        return jsonify({"error": "days must be an integer"}), 400
+    if days < 1 or days > MAX_SUMMARY_DAYS:
+        return jsonify({"error": f"days must be between 1 and {MAX_SUMMARY_DAYS}"}), 400
+
+    try:
+        versions = table_versions(SUMMARY_TABLES)
+        key = (days, tuple(versions[name] for name in SUMMARY_TABLES))
+        return jsonify(summary_cache.get(key, lambda _: build_summary(days))), 200
+    except Exception as exc:
+        print(f"dashboard summary failed: {exc}")
+        return jsonify({"error": "Failed to build dashboard summary."}), 500
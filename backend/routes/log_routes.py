@@ -1,75 +1,116 @@
 from flask import Blueprint, request, jsonify
-from models import db, Log, Activity
+from sqlalchemy import func, select
+from config import Config
+from models import db, Log
 from auth_middleware import login_required, role_required
-from utils.datetime_utils import now_ist, now_ist_naive, ensure_ist
+from utils.datetime_utils import now_ist, now_ist_naive, parse_time_arg
+from utils.pagination import parse_limit, parse_id_cursor, keyset_page
+from utils.delta_sync import delta_response, record_deletion
+from utils.etag import conditional_list
+from utils.event_broker import publish_change
+from utils.export import export_response, parse_export_format
+from utils.serializers import column_query, serialize_query, serialize_rows
 
 logs_bp = Blueprint('logs', __name__)
 
+# Any of these query params switches GET /logs into paginated mode. Without them
+# the endpoint keeps returning the legacy bare array the dashboards expect.
+LOG_PAGE_PARAMS = ("limit", "cursor", "username", "role", "domain", "action", "from", "to")
 
-def _attach_idle_times(logs):
-    usernames = {
-        (log.username or "").strip().lower()
-        for log in logs
-        if (log.username or "").strip()
-    }
 
-    if not usernames:
-        return [log.to_dict() for log in logs]
+def _filtered_logs_query():
+    query = Log.query
 
-    idle_activities = (
-        Activity.query.filter(
-            db.func.lower(Activity.username).in_(usernames),
-            Activity.idle_time.isnot(None),
-            Activity.idle_time > 0,
-        )
-        .order_by(Activity.created_at.asc())
-        .all()
-    )
+    username = (request.args.get("username") or "").strip()
+    if username:
+        query = query.filter(Log.username == username)
+
+    role = (request.args.get("role") or "").strip()
+    if role:
+        query = query.filter(Log.role.ilike(role))
+
+    domain = (request.args.get("domain") or "").strip()
+    if domain:
+        query = query.filter(Log.domain == domain)
+
+    action_prefix = (request.args.get("action") or "").strip()
+    if action_prefix:
+        query = query.filter(Log.action.startswith(action_prefix, autoescape=True))
+
+    login_from = parse_time_arg(request.args.get("from"), "from")
+    if login_from is not None:
+        query = query.filter(Log.login_time >= login_from)
+
+    login_to = parse_time_arg(request.args.get("to"), "to")
+    if login_to is not None:
+        query = query.filter(Log.login_time <= login_to)
+
+    return query
 
-    activity_map = {}
-    for activity in idle_activities:
-        key = (activity.username or "").strip().lower()
-        activity_map.setdefault(key, []).append(activity)
-
-    enriched_logs = []
-
-    for log in logs:
-        serialized = log.to_dict()
-        username_key = (log.username or "").strip().lower()
-        session_start = ensure_ist(log.login_time)
-        session_end = ensure_ist(log.logout_time)
-        total_idle_time = 0
-
-        if session_start and username_key in activity_map:
-            if session_end:
-                # Closed session: only count idle within [login, logout]
-                for activity in activity_map[username_key]:
-                    activity_time = ensure_ist(activity.created_at)
-                    if activity_time and session_start <= activity_time <= session_end:
-                        total_idle_time += activity.idle_time or 0
-            else:
-                # Open session (no logout yet): only count idle on the same day
-                session_date = session_start.date()
-                for activity in activity_map[username_key]:
-                    activity_time = ensure_ist(activity.created_at)
-                    if activity_time and activity_time.date() == session_date and activity_time >= session_start:
-                        total_idle_time += activity.idle_time or 0
-
-        serialized["idle_time"] = total_idle_time
-        enriched_logs.append(serialized)
-
-    return enriched_logs
 
 @logs_bp.route("/logs", methods=["GET"])
 @login_required
+@conditional_list("logs")
 def get_all_logs():
-    """Fetch all activity logs. Requires login."""
+    """
+    Fetch activity logs. Requires login.
+
+    Supports keyset pagination (?limit=&cursor=) and filters on username, role,
+    domain, action prefix and a login_time range (?from=&to=). Paginated
+    responses are wrapped as {"items", "next_cursor", "has_more"}. ?since=
+    returns only rows changed after that watermark (see utils.delta_sync).
+    """
     try:
-        logs = Log.query.order_by(Log.id.desc()).all()
-        return jsonify(_attach_idle_times(logs)), 200
+        if "since" in request.args:
+            return delta_response(Log.query, Log, "logs", request.args["since"])
+
+        if not any(name in request.args for name in LOG_PAGE_PARAMS):
+            return jsonify(serialize_query(Log, Log.query.order_by(Log.id.desc()))), 200
+
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            cursor = parse_id_cursor(request.args.get("cursor"))
+            query = _filtered_logs_query()
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        logs, next_cursor, has_more = keyset_page(column_query(Log, query), Log.id, limit, cursor)
+        return jsonify({
+            "items": serialize_rows(Log, logs),
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }), 200
     except Exception:
         return jsonify({"error": "Failed to fetch logs."}), 500
 
+# Columns written by GET /logs/export, in output order.
+LOG_EXPORT_COLUMNS = (
+    "id", "username", "email", "domain", "role", "designation", "action",
+    "login_time", "logout_time", "idle_seconds",
+)
+
+
+@logs_bp.route("/logs/export", methods=["GET"])
+@login_required
+@role_required("superadmin", "admin")
+def export_logs():
+    """
+    Stream logs as NDJSON (default) or CSV (?format=csv), oldest first.
+    Takes the same username/role/domain/action/from/to filters as GET /logs.
+    """
+    try:
+        export_format = parse_export_format(request.args.get("format"))
+        query = _filtered_logs_query()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    statement = (
+        query.with_entities(*(getattr(Log, column) for column in LOG_EXPORT_COLUMNS))
+        .order_by(Log.id.asc())
+        .statement
+    )
+    return export_response(statement, LOG_EXPORT_COLUMNS, export_format, "logs")
+
 @logs_bp.route("/logs", methods=["POST"])
 @login_required
 def create_log():
@@ -88,6 +129,8 @@ def create_log():
             action=data.get("action", "No action specified")
         )
         db.session.add(new_log)
+        db.session.flush()
+        publish_change("logs", "created", new_log.id)
         db.session.commit()
         return jsonify(new_log.to_dict()), 201
     except Exception:
@@ -98,11 +141,34 @@ def create_log():
 @login_required
 @role_required("superadmin")
 def clear_all_logs():
-    """Delete all log entries. Superadmin only."""
+    """
+    Delete all log entries. Superadmin only.
+
+    Rows go in id batches of RETENTION_BATCH_SIZE, one transaction each, so
+    the table is never locked for one long DELETE. Logs written after the
+    request started are kept.
+    """
+    deleted = 0
     try:
-        db.session.query(Log).delete()
+        last_id = db.session.execute(select(func.max(Log.id))).scalar() or 0
+        while True:
+            ids = db.session.execute(
+                select(Log.id).where(Log.id <= last_id).order_by(Log.id.asc()).limit(Config.RETENTION_BATCH_SIZE)
+            ).scalars().all()
+            if not ids:
+                break
+            Log.query.filter(Log.id.in_(ids)).delete(synchronize_session=False)
+            publish_change("logs", "deleted")
+            db.session.commit()
+            deleted += len(ids)
+
+        record_deletion("logs", "*")
         db.session.commit()
-        return jsonify({"message": "All logs cleared successfully"}), 200
+        return jsonify({"message": "All logs cleared successfully", "deleted": deleted}), 200
     except Exception:
         db.session.rollback()
+        if deleted:
+            # Earlier batches are gone; make ?since= clients reload.
+            record_deletion("logs", "*")
+            db.session.commit()
         return jsonify({"error": "Failed to clear logs."}), 500
@@ -1,6 +1,16 @@
 from flask import Blueprint, request, jsonify, session
-from models import db, User, Admin, Log
+from models import db, Log
 from utils.datetime_utils import now_ist_naive
+from utils.principals import (
+    Principal,
+    find_principal_by_username,
+    session_snapshot,
+    upgrade_password_hash,
+)
+from utils.passwords import PasswordPoolBusy, password_pool
+from utils.presence import presence
+from utils.serializers import serialize_query
+from .auth_routes import password_pool_busy
 
 user_bp = Blueprint('login', __name__)
 
@@ -45,6 +55,10 @@ def login():
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
 
+    if password_pool.is_saturated():
+        password_pool.reject()
+        return password_pool_busy()
+
     try:
         data = request.get_json()
 
@@ -63,12 +77,8 @@ def login():
                 "message": "Username and password required"
             }), 400
 
-        # Check admin
-        user = Admin.query.filter_by(username=username).first()
-
-        # Check user
-        if not user:
-            user = User.query.filter_by(username=username).first()
+        # Admin or User in one query
+        user = find_principal_by_username(username)
 
         if not user:
             return jsonify({
@@ -82,8 +92,7 @@ def login():
                 "message": "Invalid password"
             }), 401
 
-        # Update status
-        user.status = "Online"
+        upgrade_password_hash(user, password)
 
         # Create login log
         new_log = Log(
@@ -98,11 +107,14 @@ def login():
 
         db.session.add(new_log)
         db.session.commit()
+        presence.login(user)
 
         # Create session
         session["user_id"] = user.id
+        session["kind"] = user.kind
         session["username"] = user.username
         session["role"] = user.role
+        session["principal"] = session_snapshot(user)
 
         return jsonify({
             "success": True,
@@ -110,6 +122,10 @@ def login():
             "user": user.to_dict()
         }), 200
 
+    except PasswordPoolBusy:
+        db.session.rollback()
+        return password_pool_busy()
+
     except Exception as e:
         db.session.rollback()
 
@@ -137,12 +153,12 @@ def logout():
 
         if username:
 
-            user = Admin.query.filter_by(username=username).first() \
-                   or User.query.filter_by(username=username).first()
+            if session.get("kind") and session.get("user_id"):
+                user = Principal(session["kind"], id=session["user_id"], username=username)
+            else:
+                user = find_principal_by_username(username)
 
             if user:
-                user.status = "Offline"
-
                 # find last login log
                 last_log = Log.query.filter_by(
                     username=user.username,
@@ -154,6 +170,7 @@ def logout():
                     last_log.action = "User Logged Out"
 
                 db.session.commit()
+                presence.logout(user)
 
         session.clear()
 
@@ -183,11 +200,7 @@ def get_logs():
 
     try:
 
-        logs = Log.query.order_by(Log.id.desc()).all()
-
-        return jsonify([
-            log.to_dict() for log in logs
-        ]), 200
+        return jsonify(serialize_query(Log, Log.query.order_by(Log.id.desc()))), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify
-from models import Log
+from models import db, Log, MentorPerformance, RollupState
 from auth_middleware import login_required, role_required
+from utils.rollups import rollup_scheduler
+from utils.serializers import serialize_query
 
 misc_bp = Blueprint('misc', __name__)
 
@@ -8,11 +10,29 @@ misc_bp = Blueprint('misc', __name__)
 @login_required
 def get_recent_logs():
     """Returns last 20 logs. Requires login."""
-    logs = Log.query.order_by(Log.id.desc()).limit(20).all()
-    return jsonify([l.to_dict() for l in logs])
+    return jsonify(serialize_query(Log, Log.query.order_by(Log.id.desc()).limit(20)))
 
 @misc_bp.route("/mentors/performance", methods=["GET"])
 @login_required
 def get_mentor_performance():
-    mentors = []
-    return jsonify(mentors)
+    """
+    Per-mentor task, report and session metrics, best score first.
+
+    Reads the mentor_performance rollup maintained by the background job in
+    utils/mentor_performance.py; only the very first call on a new database
+    computes it inline.
+    """
+    try:
+        state = db.session.get(RollupState, "mentor_performance")
+        if state is None or state.refreshed_at is None:
+            rollup_scheduler.run("mentor_performance")
+
+        rows = MentorPerformance.query.order_by(
+            MentorPerformance.score.desc(),
+            MentorPerformance.name.asc(),
+        ).all()
+        return jsonify([row.to_dict() for row in rows])
+    except Exception as exc:
+        db.session.rollback()
+        print(f"get_mentor_performance failed: {exc}")
+        return jsonify({"error": "Failed to fetch mentor performance."}), 500
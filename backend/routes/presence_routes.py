@@ -0,0 +1,42 @@
+from flask import Blueprint, current_app, jsonify, request
+from auth_middleware import login_required, role_required
+from utils.datetime_utils import now_ist_iso
+from utils.presence import presence
+
+presence_bp = Blueprint('presence', __name__)
+
+
+@presence_bp.route("/presence", methods=["GET"])
+@login_required
+def get_presence():
+    """
+    Who is online right now, without fetching the user lists.
+
+    Returns ``{"online": [{username, kind, last_seen}], "counts": {...}}``
+    from the presence store; ``?kind=user`` or ``?kind=admin`` narrows it.
+    """
+    kind = request.args.get("kind")
+    if kind not in (None, "user", "admin"):
+        return jsonify({"error": "kind must be 'user' or 'admin'"}), 400
+
+    online = presence.snapshot()
+    counts = {"users": 0, "admins": 0}
+    for entry in online:
+        counts[f"{entry['kind']}s"] += 1
+    if kind:
+        online = [entry for entry in online if entry["kind"] == kind]
+
+    return jsonify({
+        "as_of": now_ist_iso(),
+        "timeout_seconds": current_app.config["PRESENCE_TIMEOUT_SECONDS"],
+        "counts": counts,
+        "online": sorted(online, key=lambda entry: entry["username"]),
+    }), 200
+
+
+@presence_bp.route("/presence/stats", methods=["GET"])
+@login_required
+@role_required("superadmin", "admin")
+def get_presence_stats():
+    """Presence write, coalescing and flush counters for this worker process."""
+    return jsonify(presence.stats()), 200
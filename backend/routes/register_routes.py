@@ -6,6 +6,11 @@ from .report_routes import DailyReport_bp, WeeklyReport_bp
 from .task_routes import task_bp
 from .activity_routes import activity_bp
 from .misc_routes import misc_bp
+from .screenshot_routes import screenshots_bp
+from .stream_routes import stream_bp
+from .dashboard_routes import dashboard_bp
+from .activity_rollup_routes import activity_rollups_bp
+from .presence_routes import presence_bp
 
 
 def register_routes(app):
@@ -18,3 +23,8 @@ def register_routes(app):
     app.register_blueprint(task_bp, url_prefix='/api')
     app.register_blueprint(activity_bp, url_prefix='/api')
     app.register_blueprint(misc_bp, url_prefix='/api')
+    app.register_blueprint(screenshots_bp, url_prefix='/api')
+    app.register_blueprint(stream_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(activity_rollups_bp, url_prefix='/api')
+    app.register_blueprint(presence_bp, url_prefix='/api')
@@ -1,8 +1,13 @@
 from flask import Blueprint, request, jsonify, session
-from models import db, DailyReport, WeeklyReport, Log, User, Admin
+from models import db, DailyReport, WeeklyReport, Log
 from auth_middleware import login_required, role_required
 import time
 from utils.datetime_utils import now_ist_naive
+from utils.actor_cache import get_actor
+from utils.delta_sync import delta_response, record_deletion
+from utils.etag import conditional_list
+from utils.event_broker import publish_change
+from utils.serializers import serialize_query
 
 DailyReport_bp = Blueprint('DailyReport', __name__)
 WeeklyReport_bp = Blueprint('WeeklyReport', __name__)
@@ -11,10 +16,12 @@ WeeklyReport_bp = Blueprint('WeeklyReport', __name__)
 
 @DailyReport_bp.route("/daily-reports", methods=["GET"])
 @login_required
+@conditional_list("daily_reports")
 def get_daily_reports():
     try:
-        reports = DailyReport.query.all()
-        return jsonify([r.to_dict() for r in reports])
+        if "since" in request.args:
+            return delta_response(DailyReport.query, DailyReport, "daily_reports", request.args["since"])
+        return jsonify(serialize_query(DailyReport, DailyReport.query))
     except Exception:
         return jsonify({"error": "Failed to fetch daily reports."}), 500
 
@@ -44,18 +51,18 @@ def create_daily_report():
     try:
         db.session.add(new_report)
 
-        active_username = session.get("username")
-        active_user = Admin.query.filter_by(username=active_username).first() or \
-                      User.query.filter_by(username=active_username).first()
+        active_user = get_actor(session.get("username"))
 
         new_log = Log(
             login_time=now_ist_naive(),
-            email=active_user.email if active_user else (data.get("email") or "system"),
-            domain=active_user.domain if active_user else "Reports",
-            role=active_user.role if active_user else "User",
+            email=active_user["email"] if active_user else (data.get("email") or "system"),
+            domain=active_user["domain"] if active_user else "Reports",
+            role=active_user["role"] if active_user else "User",
             action=f"Submitted Daily Report: {new_report.id}"
         )
         db.session.add(new_log)
+        publish_change("logs", "created")
+        publish_change("daily_reports", "created", new_report.id)
         db.session.commit()
         return jsonify(new_report.to_dict()), 201
     except Exception:
@@ -73,19 +80,19 @@ def delete_daily_report(report_id):
     try:
         rid = report.id
         db.session.delete(report)
+        record_deletion("daily_reports", rid)
 
-        active_username = session.get("username")
-        active_user = Admin.query.filter_by(username=active_username).first() or \
-                      User.query.filter_by(username=active_username).first()
+        active_user = get_actor(session.get("username"))
 
         new_log = Log(
             login_time=now_ist_naive(),
-            email=active_user.email if active_user else "system",
-            domain=active_user.domain if active_user else "Reports",
-            role=active_user.role if active_user else "User",
+            email=active_user["email"] if active_user else "system",
+            domain=active_user["domain"] if active_user else "Reports",
+            role=active_user["role"] if active_user else "User",
             action=f"Deleted Daily Report: {rid}"
         )
         db.session.add(new_log)
+        publish_change("logs", "created")
         db.session.commit()
         return jsonify({"success": True, "message": "Daily report deleted"})
     except Exception:
@@ -97,10 +104,12 @@ def delete_daily_report(report_id):
 
 @WeeklyReport_bp.route("/weekly-reports", methods=["GET"])
 @login_required
+@conditional_list("weekly_reports")
 def get_weekly_reports():
     try:
-        reports = WeeklyReport.query.all()
-        return jsonify([r.to_dict() for r in reports])
+        if "since" in request.args:
+            return delta_response(WeeklyReport.query, WeeklyReport, "weekly_reports", request.args["since"])
+        return jsonify(serialize_query(WeeklyReport, WeeklyReport.query))
     except Exception:
         return jsonify({"error": "Failed to fetch weekly reports."}), 500
 
@@ -132,18 +141,18 @@ def create_weekly_report():
     try:
         db.session.add(new_report)
 
-        active_username = session.get("username")
-        active_user = Admin.query.filter_by(username=active_username).first() or \
-                      User.query.filter_by(username=active_username).first()
+        active_user = get_actor(session.get("username"))
 
         new_log = Log(
             login_time=now_ist_naive(),
-            email=active_user.email if active_user else (data.get("email") or "system"),
-            domain=active_user.domain if active_user else "Reports",
-            role=active_user.role if active_user else "User",
+            email=active_user["email"] if active_user else (data.get("email") or "system"),
+            domain=active_user["domain"] if active_user else "Reports",
+            role=active_user["role"] if active_user else "User",
             action=f"Submitted Weekly Report: {new_report.id}"
         )
         db.session.add(new_log)
+        publish_change("logs", "created")
+        publish_change("weekly_reports", "created", new_report.id)
         db.session.commit()
         return jsonify(new_report.to_dict()), 201
     except Exception:
@@ -161,19 +170,19 @@ def delete_weekly_report(report_id):
     try:
         rid = report.id
         db.session.delete(report)
+        record_deletion("weekly_reports", rid)
 
-        active_username = session.get("username")
-        active_user = Admin.query.filter_by(username=active_username).first() or \
-                      User.query.filter_by(username=active_username).first()
+        active_user = get_actor(session.get("username"))
 
         new_log = Log(
             login_time=now_ist_naive(),
-            email=active_user.email if active_user else "system",
-            domain=active_user.domain if active_user else "Reports",
-            role=active_user.role if active_user else "User",
+            email=active_user["email"] if active_user else "system",
+            domain=active_user["domain"] if active_user else "Reports",
+            role=active_user["role"] if active_user else "User",
             action=f"Deleted Weekly Report: {rid}"
         )
         db.session.add(new_log)
+        publish_change("logs", "created")
         db.session.commit()
         return jsonify({"success": True, "message": "Weekly report deleted"})
     except Exception:
@@ -0,0 +1,32 @@
+from flask import Blueprint, jsonify, send_file
+from models import ScreenshotBlob
+from auth_middleware import login_required
+
+screenshots_bp = Blueprint('screenshots', __name__)
+
+
+def _get_blob(digest):
+    if len(digest) != 64:
+        return None
+    return ScreenshotBlob.query.get(digest.lower())
+
+
+@screenshots_bp.route("/screenshots/<digest>", methods=["GET"])
+@login_required
+def get_screenshot(digest):
+    blob = _get_blob(digest)
+    if not blob:
+        return jsonify({"error": "Screenshot not found"}), 404
+    return send_file(blob.path, mimetype="image/png", max_age=86400)
+
+
+@screenshots_bp.route("/screenshots/<digest>/thumbnail", methods=["GET"])
+@login_required
+def get_screenshot_thumbnail(digest):
+    """Small JPEG preview for dashboards; falls back to the full image."""
+    blob = _get_blob(digest)
+    if not blob:
+        return jsonify({"error": "Screenshot not found"}), 404
+    if blob.thumbnail_path:
+        return send_file(blob.thumbnail_path, mimetype="image/jpeg", max_age=86400)
+    return send_file(blob.path, mimetype="image/png", max_age=86400)
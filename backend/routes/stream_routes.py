@@ -0,0 +1,118 @@
+import json
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from models import db
+from auth_middleware import login_required, role_required
+from utils.event_broker import STREAM_TOPICS, event_broker, events_after
+
+stream_bp = Blueprint('stream', __name__)
+
+
+def _sse(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _parse_topics(raw):
+    if not raw:
+        return None
+    topics = {topic.strip() for topic in raw.split(",") if topic.strip()}
+    unknown = topics - STREAM_TOPICS
+    if unknown:
+        raise ValueError(f"Unknown topics: {', '.join(sorted(unknown))}")
+    return topics
+
+
+@stream_bp.route("/stream", methods=["GET"])
+@login_required
+@role_required("superadmin", "admin", "mentor")
+def stream_changes():
+    """
+    Server-Sent Events feed of committed writes, replacing dashboard polling.
+
+    Each ``change`` event is ``{id, topic, action, row_id, created_at}``;
+    clients refetch the affected list (e.g. with ``?since=``). ``?topics=``
+    narrows the feed. On reconnect the browser sends Last-Event-ID and missed
+    events are replayed; a ``reset`` event means too much was missed and the
+    client should do a full refresh.
+
+    Each open stream holds its connection for as long as the tab is open, so
+    serve this with threaded workers (gunicorn -k gthread) rather than sync
+    workers.
+    """
+    try:
+        topics = _parse_topics(request.args.get("topics"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    if last_event_id:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+
+    # Subscribe before reading the backlog so nothing committed in between is
+    # lost; events seen in both are de-duplicated by id below.
+    subscription = event_broker.subscribe(topics)
+    replay_limit = current_app.config["STREAM_REPLAY_LIMIT"]
+    backlog = []
+    reset = False
+    if last_event_id:
+        try:
+            backlog = events_after(last_event_id, topics, limit=replay_limit + 1)
+        except Exception:
+            event_broker.unsubscribe(subscription)
+            raise
+        if len(backlog) > replay_limit:
+            backlog, reset = [], True
+
+    # Do not pin a pooled database connection for the life of the stream.
+    db.session.remove()
+    heartbeat = current_app.config["STREAM_HEARTBEAT_SECONDS"]
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            if reset:
+                yield _sse("reset", {"reason": "replay_limit"})
+            for event in backlog:
+                yield _sse("change", event, event["id"])
+
+            sent_id = backlog[-1]["id"] if backlog else 0
+            while True:
+                if subscription.overflowed:
+                    subscription.drain()
+                    subscription.overflowed = False
+                    yield _sse("reset", {"reason": "overflow"})
+
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif event["id"] > sent_id:
+                    sent_id = event["id"]
+                    yield _sse("change", event, event["id"])
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx-style proxies from buffering the stream.
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@stream_bp.route("/stream/stats", methods=["GET"])
+@login_required
+@role_required("superadmin", "admin")
+def get_stream_stats():
+    """Subscriber count and delivery counters for this worker process."""
+    return jsonify(event_broker.stats()), 200
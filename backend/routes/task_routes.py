@@ -3,16 +3,22 @@ from models import db, Task
 from auth_middleware import login_required, role_required
 import datetime
 from utils.datetime_utils import now_ist_iso
+from utils.delta_sync import delta_response, record_deletion
+from utils.etag import conditional_list
+from utils.event_broker import publish_change
+from utils.serializers import serialize_query
 
 task_bp = Blueprint('task', __name__)
 
 @task_bp.route("/tasks", methods=["GET", "POST"])
 @login_required
+@conditional_list("tasks")
 def handle_tasks():
     if request.method == "GET":
         try:
-            tasks = Task.query.order_by(Task.id.desc()).all()
-            return jsonify([t.to_dict() for t in tasks])
+            if "since" in request.args:
+                return delta_response(Task.query, Task, "tasks", request.args["since"])
+            return jsonify(serialize_query(Task, Task.query.order_by(Task.id.desc())))
         except Exception:
             return jsonify({"error": "Failed to fetch tasks."}), 500
 
@@ -34,6 +40,8 @@ def handle_tasks():
         )
         try:
             db.session.add(new_task)
+            db.session.flush()
+            publish_change("tasks", "created", new_task.id)
             db.session.commit()
             return jsonify(new_task.to_dict()), 201
         except Exception:
@@ -55,7 +63,8 @@ def handle_task_item(task_id):
             if "isChecked" in data: task.isChecked = data["isChecked"]
             if "priority" in data: task.priority = data["priority"]
             if "deadline" in data: task.deadline = data["deadline"]
-            
+
+            publish_change("tasks", "updated", task_id)
             db.session.commit()
             return jsonify(task.to_dict())
         except Exception:
@@ -68,6 +77,7 @@ def handle_task_item(task_id):
         def delete_task():
             try:
                 db.session.delete(task)
+                record_deletion("tasks", task_id)
                 db.session.commit()
                 return jsonify({"success": True, "message": "Task deleted"})
             except Exception:
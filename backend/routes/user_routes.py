@@ -1,29 +1,39 @@
 from flask import Blueprint, request, jsonify, session
-import datetime
 from models import db, User, Log
 from auth_middleware import login_required, role_required
+from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
-from utils.datetime_utils import now_ist_naive
+from utils.datetime_utils import now_ist_naive, to_ist_iso
+from utils.actor_cache import invalidate_actor
+from utils.principals import invalidate_profile_version
+from utils.delta_sync import delta_response, record_deletion
+from utils.etag import conditional_list
+from utils.event_broker import publish_change
+from utils.bulk_import import import_response
+from utils.custom_ids import USER_ID_PREFIX, reserve_custom_ids
+from utils.passwords import PasswordPoolBusy
+from utils.pagination import parse_limit
+from utils.serializers import serialize_query
+from utils.timeline import parse_timeline_cursor, parse_types, timeline_window, user_timeline
 
 users_bp = Blueprint('users', __name__)
 
 def generate_user_id():
     """Generates a custom ID for a standard User."""
-    prefix = 'US'
-    count = User.query.count()
-    year_short = datetime.datetime.now().strftime("%y")
-    return f"{prefix}/IN/{year_short}/{str(count + 1).zfill(4)}"
+    return reserve_custom_ids(User, USER_ID_PREFIX, 1)[0]
 
 
 @users_bp.route("/users", methods=["GET"])
 @login_required
+@conditional_list("users")
 def get_users():
     role_filter = request.args.get("role")
     query = User.query
     if role_filter:
         query = query.filter(User.role.ilike(f'%{role_filter}%'))
-    users = query.all()
-    return jsonify([u.to_dict() for u in users])
+    if "since" in request.args:
+        return delta_response(query, User, "users", request.args["since"])
+    return jsonify(serialize_query(User, query))
 
 
 @users_bp.route("/users", methods=["POST"])
@@ -40,7 +50,6 @@ def create_user():
         return jsonify({"error": "A password of at least 6 characters is required"}), 400
 
     try:
-        custom_id = data.get("userId") or generate_user_id()
         designation = data.get("designation", "")
         role = str(data.get("role", "User")).strip()
         username = (data.get("username") or data.get("fullName") or "").strip()
@@ -62,8 +71,10 @@ def create_user():
         if not email:
             return jsonify({"error": "Email is required"}), 400
 
+        if User.query.filter(or_(User.username == username, User.email == email)).first():
+            return jsonify({"error": "Username or email already exists"}), 409
+
         new_user = User(
-            custom_id=custom_id,
             username=username,
             email=email,
             role=role,
@@ -72,18 +83,67 @@ def create_user():
             status=data.get("status", "Offline")
         )
         new_user.set_password(password)
+        # Reserved last, so a request rejected above does not use up a number.
+        new_user.custom_id = data.get("userId") or generate_user_id()
         db.session.add(new_user)
+        db.session.flush()
+        publish_change("users", "created", new_user.id)
         db.session.commit()
+        invalidate_actor(new_user.username)
         return jsonify(new_user.to_dict()), 201
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Username or email already exists"}), 409
+    except PasswordPoolBusy:
+        db.session.rollback()
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as exc:
         db.session.rollback()
         print(f"create_user failed: {exc}")
         return jsonify({"error": "Failed to create user. Please try again."}), 500
 
 
+@users_bp.route("/users/<username>/timeline", methods=["GET"])
+@login_required
+def get_user_timeline(username):
+    """
+    One user's sessions and activity events, merged newest first.
+
+    ?from=&to= bound the window (default the last 7 days), ?types= picks
+    from session, idle, app_usage, screenshot, login and logout (default
+    all but login/logout), and ?limit=&cursor= page back through time.
+    """
+    try:
+        start, end = timeline_window(request.args.get("from"), request.args.get("to"))
+        types = parse_types(request.args.get("types"))
+        limit = parse_limit(request.args.get("limit"))
+        cursor = parse_timeline_cursor(request.args.get("cursor"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    try:
+        items, next_cursor = user_timeline(username, start, end, types, limit, cursor)
+        return jsonify({
+            "username": username,
+            "from": to_ist_iso(start),
+            "to": to_ist_iso(end),
+            "items": items,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        }), 200
+    except Exception as exc:
+        print(f"get_user_timeline failed: {exc}")
+        return jsonify({"error": "Failed to fetch timeline."}), 500
+
+
+@users_bp.route("/users/import", methods=["POST"])
+@login_required
+@role_required("superadmin", "admin")
+def import_users():
+    """Create users in bulk from a CSV or JSON upload."""
+    return import_response(User, "user")
+
+
 @users_bp.route("/users/<int:user_id>", methods=["PUT"])
 @login_required
 @role_required("superadmin", "admin")
@@ -95,6 +155,7 @@ def update_user(user_id):
     data = request.json
     if not data:
         return jsonify({"error": "Request body is required"}), 400
+    previous_username = user.username
     try:
         if "userId" in data: user.custom_id = data["userId"]
         if "fullName" in data and data["fullName"].strip(): user.username = data["fullName"].strip()
@@ -115,11 +176,18 @@ def update_user(user_id):
             user.role = data["role"]
         if "status" in data: user.status = data["status"]
 
+        user.profile_version = User.profile_version + 1
+        publish_change("users", "updated", user_id)
         db.session.commit()
+        invalidate_actor(previous_username, user.username)
+        invalidate_profile_version("user", user_id)
         return jsonify(user.to_dict()), 200
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Username or email already exists"}), 409
+    except PasswordPoolBusy:
+        db.session.rollback()
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as exc:
         db.session.rollback()
         print(f"update_user failed: {exc}")
@@ -137,6 +205,7 @@ def delete_user(user_id):
     try:
         username_to_delete = user.username
         db.session.delete(user)
+        record_deletion("users", user_id)
 
         try:
             new_log = Log(
@@ -146,10 +215,13 @@ def delete_user(user_id):
                 action=f"Deleted User: {username_to_delete}"
             )
             db.session.add(new_log)
+            publish_change("logs", "created")
         except Exception:
             pass  # Don't fail the delete if logging fails
 
         db.session.commit()
+        invalidate_actor(username_to_delete)
+        invalidate_profile_version("user", user_id)
         return jsonify({"success": True, "message": "User deleted successfully"}), 200
     except Exception:
         db.session.rollback()
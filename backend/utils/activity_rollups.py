@@ -0,0 +1,230 @@
+import json
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import or_, select
+
+from models import db, Activity, ActivityDaily, ActivityHourly, Log
+from utils.datetime_utils import ensure_ist, now_ist_naive
+from utils.idle_index import session_window
+
+BATCH_SIZE = 5000
+MAX_ROWS_PER_RUN = 50000
+# Rows written this recently may sit behind still-uncommitted lower ids, so
+# the watermark does not move past them until the next run.
+REFRESH_OVERLAP = timedelta(minutes=1)
+MAX_APP_URLS = 200
+MAX_SESSION_DAYS = 7
+
+_ACTION_COUNTERS = {
+    "login": "logins",
+    "logout": "logouts",
+    "idle": "idle_events",
+    "app_usage": "app_usage_events",
+    "screenshot": "screenshots",
+}
+
+
+def _naive(value):
+    value = ensure_ist(value)
+    return value.replace(tzinfo=None) if value is not None else None
+
+
+def _day_start(value):
+    return datetime.combine(value.date(), time.min)
+
+
+def _idle_start(metadata):
+    """Where an idle row sat before idle_end moved its created_at."""
+    try:
+        raw = json.loads(metadata or "{}").get("idle_start")
+        return _naive(datetime.fromisoformat(raw)) if raw else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _collect_new_rows(watermark, dirty, cutoff):
+    """
+    Mark the (username, day) of every Activity row past ``watermark``.
+    Returns the new watermark: the last id before any row too recent to trust.
+    """
+    new_watermark = watermark
+    held = False
+    scanned = 0
+
+    while scanned < MAX_ROWS_PER_RUN:
+        rows = db.session.execute(
+            select(
+                Activity.id, Activity.username, Activity.action,
+                Activity.created_at, Activity.updated_at, Activity.activity_metadata,
+            )
+            .where(Activity.id > watermark)
+            .order_by(Activity.id.asc())
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        for row in rows:
+            _mark_activity(dirty, row)
+            if row.updated_at is not None and row.updated_at >= cutoff:
+                held = True
+            if not held:
+                new_watermark = row.id
+
+        watermark = rows[-1].id
+        scanned += len(rows)
+    return new_watermark
+
+
+def _collect_updated_rows(watermark, since, dirty):
+    """Rows behind the watermark changed in place (idle_end closes idle rows)."""
+    rows = db.session.execute(
+        select(Activity.username, Activity.action, Activity.created_at, Activity.activity_metadata)
+        .where(Activity.id <= watermark, Activity.updated_at >= since)
+    ).all()
+    for row in rows:
+        _mark_activity(dirty, row)
+
+
+def _mark_activity(dirty, row):
+    if not row.username or row.created_at is None:
+        return
+    dirty.add((row.username, _day_start(_naive(row.created_at))))
+    if row.action == "idle":
+        idle_start = _idle_start(row.activity_metadata)
+        if idle_start is not None:
+            dirty.add((row.username, _day_start(idle_start)))
+
+
+def _collect_sessions(since, now, dirty):
+    """Days covered by sessions that changed, plus today's still-open ones."""
+    today = _day_start(now)
+    conditions = [Log.logout_time.is_(None) & (Log.login_time >= today)]
+    if since is not None:
+        conditions.append(Log.updated_at >= since)
+
+    rows = db.session.execute(
+        select(Log.username, Log.login_time, Log.logout_time).where(or_(*conditions))
+    ).all()
+    for username, login_time, logout_time in rows:
+        window = session_window(login_time, logout_time)
+        if not username or window is None:
+            continue
+        day = _day_start(_naive(window[0]))
+        last_day = min(_day_start(_naive(window[1])), day + timedelta(days=MAX_SESSION_DAYS))
+        while day <= last_day:
+            dirty.add((username, day))
+            day += timedelta(days=1)
+
+
+def _empty_bucket():
+    bucket = dict.fromkeys(
+        ("events", "idle_seconds", "session_seconds", *_ACTION_COUNTERS.values()), 0
+    )
+    bucket["app_urls"] = set()
+    return bucket
+
+
+def _rebuild_day(username, day, now):
+    """Recompute one user's 24 hourly buckets and the daily bucket for ``day``."""
+    day_end = day + timedelta(days=1)
+    hours = {}
+
+    rows = db.session.execute(
+        select(Activity.action, Activity.idle_time, Activity.app_url, Activity.created_at)
+        .where(
+            Activity.username == username,
+            Activity.created_at >= day,
+            Activity.created_at < day_end,
+        )
+    ).all()
+    for action, idle_time, app_url, created_at in rows:
+        created_at = _naive(created_at)
+        bucket = hours.setdefault(created_at.replace(minute=0, second=0, microsecond=0), _empty_bucket())
+        bucket["events"] += 1
+        counter = _ACTION_COUNTERS.get(action)
+        if counter:
+            bucket[counter] += 1
+        if action == "idle" and idle_time:
+            bucket["idle_seconds"] += max(int(idle_time), 0)
+        if app_url and len(bucket["app_urls"]) < MAX_APP_URLS:
+            bucket["app_urls"].add(app_url)
+
+    sessions = db.session.execute(
+        select(Log.login_time, Log.logout_time).where(
+            Log.username == username,
+            Log.login_time < day_end,
+            Log.login_time >= day - timedelta(days=MAX_SESSION_DAYS),
+            or_(Log.logout_time.is_(None), Log.logout_time > day),
+        )
+    ).all()
+    for login_time, logout_time in sessions:
+        window = session_window(login_time, logout_time)
+        if window is None:
+            continue
+        start = max(_naive(window[0]), day)
+        end = min(_naive(window[1]), day_end, now)
+        hour = start.replace(minute=0, second=0, microsecond=0)
+        while hour < end:
+            next_hour = hour + timedelta(hours=1)
+            seconds = int((min(end, next_hour) - max(start, hour)).total_seconds())
+            if seconds > 0:
+                hours.setdefault(hour, _empty_bucket())["session_seconds"] += seconds
+            hour = next_hour
+
+    _store_buckets(ActivityHourly, username, day, day_end, hours)
+
+    daily = _empty_bucket()
+    for bucket in hours.values():
+        for key, value in bucket.items():
+            if key == "app_urls":
+                daily[key].update(value)
+            else:
+                daily[key] += value
+    _store_buckets(ActivityDaily, username, day, day_end, {day: daily} if hours else {})
+
+
+def _store_buckets(model, username, start, end, buckets):
+    existing = {
+        row.bucket_start: row
+        for row in model.query.filter(
+            model.username == username,
+            model.bucket_start >= start,
+            model.bucket_start < end,
+        )
+    }
+    for bucket_start, values in buckets.items():
+        row = existing.pop(bucket_start, None)
+        if row is None:
+            row = model(username=username, bucket_start=bucket_start)
+            db.session.add(row)
+        for key, value in values.items():
+            if key == "app_urls":
+                value = json.dumps(sorted(value)[:MAX_APP_URLS]) if value else None
+            setattr(row, key, value)
+    for row in existing.values():
+        db.session.delete(row)
+
+
+def refresh_activity_rollups(state, full):
+    """
+    Rollup job: bring activity_hourly / activity_daily up to date.
+
+    New Activity rows are found by id past ``state.watermark``; rows closed in
+    place and changed sessions by updated_at. Each affected (username, day)
+    is rebuilt from its raw rows, which keeps reruns idempotent, so the
+    periodic ``full`` pass needs nothing extra: the watermark already covers
+    all history, starting from 0 on the first run.
+    """
+    now = now_ist_naive()
+    since = state.refreshed_at - REFRESH_OVERLAP if state.refreshed_at else None
+    watermark = state.watermark or 0
+    dirty = set()
+
+    if since is not None:
+        _collect_updated_rows(watermark, since, dirty)
+    _collect_sessions(since, now, dirty)
+    state.watermark = _collect_new_rows(watermark, dirty, now - REFRESH_OVERLAP)
+
+    for username, day in sorted(dirty):
+        _rebuild_day(username, day, now)
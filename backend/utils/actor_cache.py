@@ -0,0 +1,36 @@
+from config import Config
+from utils.ttl_cache import TTLCache
+
+
+def _load_actor(username):
+    from utils.principals import find_principal_by_username
+
+    actor = find_principal_by_username(username)
+    if not actor:
+        return None
+
+    return {
+        "id": actor.id,
+        "kind": actor.kind,
+        "username": actor.username,
+        "email": actor.email,
+        "domain": actor.domain,
+        "role": actor.role,
+        "designation": actor.designation,
+    }
+
+
+# Unknown usernames are cached too (as None) so agents reporting for a deleted
+# user don't hit the principal tables on every event.
+actor_cache = TTLCache(ttl=Config.ACTOR_CACHE_TTL, max_size=Config.ACTOR_CACHE_SIZE)
+
+
+def get_actor(username):
+    """Cached snapshot dict for an Admin or User by username, or None."""
+    if not username:
+        return None
+    return actor_cache.get(username, _load_actor)
+
+
+def invalidate_actor(*usernames):
+    actor_cache.invalidate(*(username for username in usernames if username))
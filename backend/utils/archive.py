@@ -0,0 +1,154 @@
+"""
+Gzip JSON-lines archives of rows removed by the retention job.
+
+Each archive is ``<folder>/<table>/<table>-<first id>-<last id>.jsonl.gz``
+with a ``.manifest.json`` beside it recording the table, columns, row count,
+id and time ranges and a SHA-256 of the archive file. Rows hold raw column
+values (datetimes as ISO strings), so ``restore_archive`` is lossless.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import DateTime, select
+
+from models import db
+from utils.datetime_utils import now_ist_iso
+from utils.event_broker import publish_change
+from utils.screenshot_store import retain_screenshot
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode(table, row):
+    decoded = {}
+    for name, value in row.items():
+        column = table.c.get(name)
+        if column is None:
+            continue
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        decoded[name] = value
+    return decoded
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_archive(folder, table, rows, time_column):
+    """
+    Write ``rows`` (mappings of column values, ordered by id) to a new archive
+    and its manifest. Both are written to temp files and renamed, so a crash
+    never leaves a half-written archive under its final name. Returns the
+    manifest dict.
+    """
+    table_folder = os.path.join(folder, table.name)
+    os.makedirs(table_folder, exist_ok=True)
+
+    first_id, last_id = rows[0]["id"], rows[-1]["id"]
+    path = os.path.join(table_folder, f"{table.name}-{first_id:010d}-{last_id:010d}.jsonl.gz")
+    times = [row[time_column] for row in rows if row[time_column] is not None]
+
+    with gzip.open(f"{path}.part", "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps({key: _encode(value) for key, value in row.items()}))
+            f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.part", path)
+
+    manifest = {
+        "table": table.name,
+        "file": os.path.basename(path),
+        "columns": [column.name for column in table.columns],
+        "rows": len(rows),
+        "first_id": first_id,
+        "last_id": last_id,
+        "time_column": time_column,
+        "time_from": _encode(min(times)) if times else None,
+        "time_to": _encode(max(times)) if times else None,
+        "sha256": _sha256(path),
+        "created_at": now_ist_iso(),
+    }
+    manifest_path = path + MANIFEST_SUFFIX
+    with open(f"{manifest_path}.part", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{manifest_path}.part", manifest_path)
+    return manifest
+
+
+def list_archives(folder, table_name=None):
+    """Manifests under ``folder``, oldest ids first, each with its ``path``."""
+    pattern = os.path.join(folder, table_name or "*", f"*{MANIFEST_SUFFIX}")
+    manifests = []
+    for manifest_path in glob.glob(pattern):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["path"] = manifest_path[: -len(MANIFEST_SUFFIX)]
+        manifests.append(manifest)
+    return sorted(manifests, key=lambda manifest: (manifest["table"], manifest["first_id"]))
+
+
+def read_archive(path):
+    """Yield the archived rows of ``path`` as dicts of raw JSON values."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _retain_screenshots(table_name, rows):
+    # Archiving released each row's screenshot blob, so a restored row takes
+    # a reference again, or loses its path if the blob was collected since.
+    if table_name == "activity":
+        for row in rows:
+            if row.get("screenshot_path") and not retain_screenshot(row["screenshot_path"]):
+                row["screenshot_path"] = None
+
+
+def restore_archive(manifest, batch_size=1000):
+    """
+    Insert an archive's rows back into its table, skipping ids that already
+    exist, so restoring twice (or overlapping archives) is harmless. Verifies
+    the checksum first. Restored activity rows re-reference their screenshot
+    blobs, and have screenshot_path cleared where the blob is gone. Commits
+    per batch; returns the number of rows inserted.
+    """
+    if _sha256(manifest["path"]) != manifest["sha256"]:
+        raise ValueError(f"Checksum mismatch for {manifest['path']}")
+
+    table = db.metadata.tables[manifest["table"]]
+    inserted = 0
+    batch = []
+
+    def flush():
+        ids = [row["id"] for row in batch]
+        existing = set(db.session.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+        missing = [row for row in batch if row["id"] not in existing]
+        if missing:
+            _retain_screenshots(table.name, missing)
+            db.session.execute(table.insert(), missing)
+            publish_change(table.name, "restored")
+        db.session.commit()
+        return len(missing)
+
+    for row in read_archive(manifest["path"]):
+        batch.append(_decode(table, row))
+        if len(batch) >= batch_size:
+            inserted += flush()
+            batch = []
+    if batch:
+        inserted += flush()
+    return inserted
@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+
+from flask import current_app, jsonify, request
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from utils.actor_cache import invalidate_actor
+from utils.custom_ids import USER_ID_PREFIX, admin_id_prefix, reserve_custom_ids
+from utils.event_broker import publish_change
+from utils.passwords import PasswordPoolBusy, password_pool
+
+# Accepted spellings of each field, the same ones POST /users and /admins read.
+FIELD_ALIASES = {
+    "custom_id": ("userId", "adminId", "custom_id"),
+    "username": ("username", "fullName"),
+    "email": ("email",),
+    "role": ("role",),
+    "domain": ("Domain", "domain", "department"),
+    "designation": ("designation",),
+    "status": ("status",),
+}
+# Rows per IN (...) duplicate lookup and per INSERT executemany.
+CHUNK_SIZE = 500
+
+
+def parse_records(text, is_csv):
+    """Import rows from CSV (with a header line) or a JSON array of objects."""
+    if is_csv:
+        return list(csv.DictReader(io.StringIO(text)))
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise ValueError("Body must be a JSON array or CSV") from None
+    if isinstance(data, dict):
+        data = data.get("records")
+    if not isinstance(data, list):
+        raise ValueError('JSON must be an array of records or {"records": [...]}')
+    return data
+
+
+def records_from_request():
+    """Rows from an uploaded ``file``, a text/csv body or a JSON body."""
+    upload = request.files.get("file")
+    if upload is not None:
+        is_csv = upload.mimetype == "text/csv" or (upload.filename or "").lower().endswith(".csv")
+        return parse_records(upload.read().decode("utf-8-sig"), is_csv)
+    return parse_records(request.get_data(as_text=True), request.mimetype == "text/csv")
+
+
+def _pick(record, field):
+    for key in FIELD_ALIASES[field]:
+        value = record.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def _normalize(record, kind):
+    """(row values, password, error) for one record, with the single-create rules."""
+    if not isinstance(record, dict):
+        return None, None, "Record must be an object"
+
+    username = _pick(record, "username")
+    email = _pick(record, "email")
+    password = record.get("password")
+    if not username:
+        return None, None, "Username or full name is required"
+    if not email:
+        return None, None, "Email is required"
+    if not password or len(str(password)) < 6:
+        return None, None, "A password of at least 6 characters is required"
+
+    designation = _pick(record, "designation")
+    if kind == "user":
+        role = _pick(record, "role") or "User"
+    else:
+        role = (_pick(record, "role") or "admin").lower()
+    if designation.lower() == "mentor":
+        role = "mentor"
+
+    row = {
+        "custom_id": _pick(record, "custom_id") or None,
+        "username": username,
+        "email": email,
+        "role": role,
+        "domain": _pick(record, "domain"),
+        "designation": designation,
+        "status": _pick(record, "status") or "Offline",
+    }
+    return row, str(password), None
+
+
+def _existing(model, usernames, emails):
+    taken_usernames, taken_emails = set(), set()
+    for start in range(0, max(len(usernames), len(emails)), CHUNK_SIZE):
+        username_chunk = usernames[start:start + CHUNK_SIZE]
+        email_chunk = emails[start:start + CHUNK_SIZE]
+        for username, email in db.session.execute(
+            select(model.username, model.email).where(
+                or_(model.username.in_(username_chunk), model.email.in_(email_chunk))
+            )
+        ):
+            taken_usernames.add(username)
+            taken_emails.add(email)
+    return taken_usernames, taken_emails
+
+
+def import_principals(model, kind, records, dry_run=False, bounded=False):
+    """
+    Validate and insert many User (``kind`` "user") or Admin rows at once.
+
+    Duplicates, against the table and within the batch, are found with one
+    lookup per CHUNK_SIZE rows instead of a query per record. Passwords are
+    hashed in parallel across the password pool (``bounded`` requests share
+    its queue with logins a few at a time), custom IDs are reserved in
+    one block per prefix, and rows go in with executemany INSERTs in a single
+    transaction. Invalid or duplicate records are skipped and reported by
+    1-based row number; the rest are created. Returns the summary dict.
+    """
+    errors = []
+    accepted = []
+    for index, record in enumerate(records, start=1):
+        row, password, error = _normalize(record, kind)
+        if error:
+            errors.append({"row": index, "error": error})
+        else:
+            accepted.append((index, row, password))
+
+    taken_usernames, taken_emails = _existing(
+        model,
+        [row["username"] for _, row, _ in accepted],
+        [row["email"] for _, row, _ in accepted],
+    )
+    rows, passwords = [], []
+    for index, row, password in accepted:
+        if row["username"] in taken_usernames or row["email"] in taken_emails:
+            errors.append({"row": index, "error": "Username or email already exists"})
+            continue
+        taken_usernames.add(row["username"])
+        taken_emails.add(row["email"])
+        rows.append(row)
+        passwords.append(password)
+
+    if rows and not dry_run:
+        hashes = password_pool.hash_chunked(passwords) if bounded else password_pool.hash_many(passwords)
+        for row, password_hash in zip(rows, hashes):
+            row["password"] = password_hash
+        by_prefix = {}
+        for row in rows:
+            if not row["custom_id"]:
+                prefix = USER_ID_PREFIX if kind == "user" else admin_id_prefix(row["role"])
+                by_prefix.setdefault(prefix, []).append(row)
+        for prefix, prefix_rows in by_prefix.items():
+            for row, custom_id in zip(prefix_rows, reserve_custom_ids(model, prefix, len(prefix_rows))):
+                row["custom_id"] = custom_id
+
+        for start in range(0, len(rows), CHUNK_SIZE):
+            db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+        publish_change(f"{kind}s", "created")
+        db.session.commit()
+        invalidate_actor(*(row["username"] for row in rows))
+
+    return {
+        "created": 0 if dry_run else len(rows),
+        "valid": len(rows),
+        "errors": sorted(errors, key=lambda error: error["row"]),
+        "dry_run": dry_run,
+        "items": [
+            {key: row[key] for key in ("custom_id", "username", "email", "role")}
+            for row in rows
+        ],
+    }
+
+
+def import_response(model, kind):
+    """Handle POST /users/import and /admins/import; ``?dry_run=1`` only validates."""
+    try:
+        records = records_from_request()
+    except (ValueError, UnicodeDecodeError) as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    max_rows = current_app.config["BULK_IMPORT_MAX_ROWS"]
+    if not records:
+        return jsonify({"error": "No records to import"}), 400
+    if len(records) > max_rows:
+        return jsonify({"error": f"At most {max_rows} records per import"}), 413
+
+    dry_run = request.args.get("dry_run", "").strip().lower() in {"1", "true", "yes"}
+    if not dry_run and password_pool.is_saturated():
+        password_pool.reject()
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}
+    try:
+        result = import_principals(model, kind, records, dry_run=dry_run, bounded=True)
+    except PasswordPoolBusy:
+        db.session.rollback()
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Username, email or ID already exists"}), 409
+    except Exception as exc:
+        db.session.rollback()
+        print(f"{kind} import failed: {exc}")
+        return jsonify({"error": f"Failed to import {kind}s. Please try again."}), 500
+    return jsonify(result), 200 if dry_run else 201
@@ -0,0 +1,103 @@
+import os
+import threading
+
+from sqlalchemy import select
+
+from config import Config
+from models import db, IdCounter
+from utils.datetime_utils import now_ist_naive
+from utils.sql import insert_or_increment
+
+USER_ID_PREFIX = "US"
+ADMIN_ID_PREFIXES = {"superadmin": "SA", "admin": "AD", "mentor": "MT"}
+
+
+def admin_id_prefix(role):
+    return ADMIN_ID_PREFIXES.get((role or "").lower(), "AD")
+
+
+def format_custom_id(prefix, year_short, number):
+    return f"{prefix}/IN/{year_short}/{str(number).zfill(4)}"
+
+
+def _highest_issued(connection, model, prefix, year_short):
+    stem = f"{prefix}/IN/{year_short}/"
+    highest = 0
+    for custom_id in connection.execute(
+        select(model.custom_id).where(model.custom_id.startswith(stem, autoescape=True))
+    ).scalars():
+        suffix = custom_id[len(stem):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+class CustomIdAllocator:
+    """
+    Hands out custom ID numbers from the id_counters row of each
+    (prefix, year), starting over at 0001 when the year changes.
+
+    Each reservation is one atomic upsert-and-increment in its own short
+    transaction, so concurrent creates never get the same number and the
+    counter row is not held locked while the caller hashes passwords or
+    inserts. A missing row (new database, new year) is seeded from the
+    highest ID already in the table. With a block size above 1 a worker
+    reserves that many numbers at once and serves later creates from memory;
+    numbers left in a block when the worker exits are skipped, as they are
+    after a rolled-back create.
+    """
+
+    def __init__(self, block_size=1):
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = None
+
+    def reserve(self, model, prefix, count):
+        """``count`` new custom IDs like ``US/IN/26/0042`` for ``model``."""
+        year_short = now_ist_naive().strftime("%y")
+        key = (prefix, year_short)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Blocks reserved before a fork must not be served twice.
+                self._blocks = {}
+                self._pid = os.getpid()
+
+            next_number, last_number = self._blocks.get(key, (1, 0))
+            taken = min(count, last_number - next_number + 1)
+            numbers = list(range(next_number, next_number + taken))
+            next_number += taken
+            if taken < count:
+                amount = max(count - taken, self.block_size)
+                last_number = self._increment(model, prefix, year_short, amount)
+                next_number = last_number - amount + 1
+                numbers.extend(range(next_number, next_number + count - taken))
+                next_number += count - taken
+            self._blocks[key] = (next_number, last_number)
+
+        return [format_custom_id(prefix, year_short, number) for number in numbers]
+
+    def _increment(self, model, prefix, year_short, amount):
+        """Advance the counter by ``amount`` and return the new last number."""
+        counter_row = (IdCounter.prefix == prefix) & (IdCounter.year_short == year_short)
+        with db.engine.begin() as connection:
+            seed = 0
+            if connection.execute(select(IdCounter.last_value).where(counter_row)).scalar() is None:
+                seed = _highest_issued(connection, model, prefix, year_short)
+            # Two workers seeding at once is fine: the loser's insert turns
+            # into an increment on the winner's row.
+            insert_or_increment(
+                IdCounter,
+                {"prefix": prefix, "year_short": year_short, "last_value": seed + amount},
+                "last_value",
+                amount,
+                connection=connection,
+            )
+            return connection.execute(select(IdCounter.last_value).where(counter_row)).scalar_one()
+
+
+custom_id_allocator = CustomIdAllocator(Config.CUSTOM_ID_BLOCK_SIZE)
+
+
+def reserve_custom_ids(model, prefix, count):
+    return custom_id_allocator.reserve(model, prefix, count)
@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
 
 try:
     from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
@@ -44,6 +45,57 @@ def ensure_ist(value):
     return value.astimezone(IST)
 
 
+@lru_cache(maxsize=4096)
+def _ist_offset_suffix(day):
+    """The "+05:30" that isoformat() appends to an IST datetime on ``day``."""
+    noon = datetime.combine(day, time(12))
+    return noon.replace(tzinfo=IST).isoformat()[len(noon.isoformat()):]
+
+
 def to_ist_iso(value):
-    normalized = ensure_ist(value)
-    return normalized.isoformat() if normalized is not None else None
+    if value is None:
+        return None
+
+    if value.tzinfo is None:
+        # Columns hold naive IST, so only the offset is needed, and it is
+        # looked up once per day rather than once per value.
+        return value.isoformat() + _ist_offset_suffix(value.date())
+
+    return value.astimezone(IST).isoformat()
+
+
+def parse_client_datetime(value):
+    if not value:
+        return None
+
+    if isinstance(value, datetime):
+        return ensure_ist(value)
+
+    text = str(value).strip()
+    if not text or text.upper() == "NULL":
+        return None
+
+    normalized = text.replace(" ", "T")
+
+    try:
+        return ensure_ist(datetime.fromisoformat(normalized))
+    except ValueError:
+        pass
+
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return ensure_ist(datetime.strptime(text, fmt))
+        except ValueError:
+            continue
+
+    return None
+
+
+def parse_time_arg(raw_value, name):
+    """A ?from=/?to= style query value as naive IST, None if absent; ValueError if malformed."""
+    if not raw_value:
+        return None
+    parsed = parse_client_datetime(raw_value)
+    if parsed is None:
+        raise ValueError(f"{name} must be an ISO-8601 datetime")
+    return parsed.replace(tzinfo=None)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from flask import jsonify
+
+from config import Config
+from models import db, Tombstone
+from utils.datetime_utils import now_ist_naive, parse_client_datetime, to_ist_iso
+from utils.event_broker import publish_change
+from utils.serializers import serialize_query
+
+
+def parse_since(value):
+    """Parse a ?since= watermark into the naive IST form the columns store."""
+    parsed = parse_client_datetime(value)
+    if parsed is None:
+        raise ValueError("since must be an ISO-8601 datetime")
+    return parsed.replace(tzinfo=None)
+
+
+def record_deletion(table_name, row_id):
+    """
+    Add a tombstone for a deleted row to the caller's transaction, and the
+    matching /api/stream event. Deletes are rare, so expired tombstones are
+    pruned here rather than by a job.
+    """
+    horizon = now_ist_naive() - timedelta(days=Config.TOMBSTONE_RETENTION_DAYS)
+    Tombstone.query.filter(Tombstone.deleted_at < horizon).delete(synchronize_session=False)
+    db.session.add(Tombstone(table_name=table_name, row_id=str(row_id)))
+    publish_change(table_name, "deleted", row_id)
+
+
+def delta_response(query, model, table_name, since_arg, serialize=None):
+    """
+    Rows of ``query`` inserted/updated since the watermark plus tombstones.
+    ``serialize`` turns a query into the items list (default: the model's
+    to_dict shape via utils.serializers).
+
+    The returned watermark is taken before reading and pulled back by
+    SYNC_OVERLAP_SECONDS, so a transaction that commits while this request
+    runs is picked up by the next poll; clients should treat items as upserts.
+    Watermarks older than the tombstone retention window get a full listing
+    with ``reset: true`` since deletions from before then are gone.
+    """
+    try:
+        since = parse_since(since_arg)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    serialize = serialize or (lambda rows_query: serialize_query(model, rows_query))
+    watermark = now_ist_naive() - timedelta(seconds=Config.SYNC_OVERLAP_SECONDS)
+    horizon = now_ist_naive() - timedelta(days=Config.TOMBSTONE_RETENTION_DAYS)
+
+    if since < horizon:
+        return jsonify({
+            "items": serialize(query),
+            "deleted": [],
+            "reset": True,
+            "watermark": to_ist_iso(watermark),
+        }), 200
+
+    items = serialize(query.filter(model.updated_at >= since))
+    tombstones = (
+        Tombstone.query.filter(
+            Tombstone.table_name == table_name,
+            Tombstone.deleted_at >= since,
+        )
+        .order_by(Tombstone.id.asc())
+        .all()
+    )
+    deleted_ids = [tombstone.row_id for tombstone in tombstones]
+
+    return jsonify({
+        "items": items,
+        "deleted": deleted_ids,
+        # "*" in deleted means the whole table was cleared.
+        "reset": "*" in deleted_ids,
+        "watermark": to_ist_iso(watermark),
+    }), 200
@@ -0,0 +1,267 @@
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import Config
+from models import db, ChangeEvent, TableVersion
+from utils.datetime_utils import now_ist_naive
+from utils.sql import insert_or_increment
+
+# Same names as the tables (and delta-sync tombstones) the events describe.
+STREAM_TOPICS = {
+    "users", "admins", "logs", "activity",
+    "daily_reports", "weekly_reports", "tasks",
+}
+
+_PRUNE_EVERY_SECONDS = 60
+# session.info key for topics whose table version is bumped at commit.
+_PENDING_TOPICS = "pending_table_versions"
+_last_pruned = 0.0
+
+
+def publish_change(topic, action, row_id=None):
+    """
+    Add a change event to the caller's transaction and mark the topic's
+    table version (which invalidates list ETags) to be bumped at commit.
+    The event reaches /api/stream subscribers on every worker once the
+    transaction commits, and never if it rolls back. Expired events are
+    pruned at most once a minute per process.
+    """
+    global _last_pruned
+    monotonic_now = time.monotonic()
+    if monotonic_now - _last_pruned >= _PRUNE_EVERY_SECONDS:
+        _last_pruned = monotonic_now
+        horizon = now_ist_naive() - timedelta(minutes=Config.CHANGE_EVENT_RETENTION_MINUTES)
+        ChangeEvent.query.filter(ChangeEvent.created_at < horizon).delete(synchronize_session=False)
+
+    db.session.add(ChangeEvent(
+        topic=topic,
+        action=action,
+        row_id=str(row_id) if row_id is not None else None,
+    ))
+    db.session.info.setdefault(_PENDING_TOPICS, set()).add(topic)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_table_versions(session):
+    # Every write on a table upserts the same table_versions row, so the row
+    # lock is taken as late as possible (held only for the commit itself)
+    # and in sorted order, so two multi-topic transactions cannot deadlock.
+    topics = session.info.pop(_PENDING_TOPICS, None)
+    if not topics:
+        return
+    connection = session.connection()
+    for topic in sorted(topics):
+        insert_or_increment(TableVersion, {"table_name": topic, "version": 1}, "version", connection=connection)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_table_versions(session):
+    session.info.pop(_PENDING_TOPICS, None)
+
+
+def events_after(last_id, topics=None, limit=None):
+    """Events with an id above ``last_id``, oldest first."""
+    query = ChangeEvent.query.filter(ChangeEvent.id > last_id)
+    if topics:
+        query = query.filter(ChangeEvent.topic.in_(topics))
+    query = query.order_by(ChangeEvent.id.asc())
+    if limit:
+        query = query.limit(limit)
+    return [change.to_dict() for change in query.all()]
+
+
+def late_events(last_id, created_since):
+    """
+    Events at or below ``last_id`` created since ``created_since``: the
+    re-read window for rows that committed after a higher id was seen.
+    """
+    query = ChangeEvent.query.filter(ChangeEvent.id <= last_id, ChangeEvent.created_at >= created_since)
+    return [change.to_dict() for change in query.order_by(ChangeEvent.id.asc()).all()]
+
+
+class Subscription:
+    """One /api/stream connection's view of the broker."""
+
+    def __init__(self, topics, max_size):
+        self.topics = set(topics) if topics else None
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=max_size)
+
+    def wants(self, change):
+        return self.topics is None or change["topic"] in self.topics
+
+    def put(self, change):
+        try:
+            self._queue.put_nowait(change)
+        except queue.Full:
+            # A client this far behind has to refetch anyway; tell it so once
+            # instead of buffering without bound.
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class EventBroker:
+    """
+    Fans committed change events out to this process's stream subscribers.
+
+    The change_events table is the pub/sub channel between gunicorn workers:
+    writers insert rows, and each worker runs one poller thread that reads
+    new rows while it has subscribers, so N open dashboards cost one query
+    per interval per worker rather than N sets of polled list requests.
+    Swapping in Redis or Postgres LISTEN/NOTIFY only means replacing
+    ``publish_change`` and ``_poll``.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._last_id = None
+        # Recently delivered ids, so rows re-read in the overlap go out once.
+        self._recent_ids = {}
+        self._started_pid = None
+        self._wakeup = threading.Event()
+        self._counters = {"delivered": 0, "overflowed": 0}
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["event_broker"] = self
+
+    def subscribe(self, topics=None):
+        """Register a subscriber. Call from a request (needs the app context)."""
+        subscription = Subscription(topics, self.app.config["STREAM_QUEUE_SIZE"])
+        with self._lock:
+            if self._last_id is None:
+                self._last_id = db.session.query(db.func.max(ChangeEvent.id)).scalar() or 0
+                # Events already in the overlap window predate this subscriber.
+                created_since = now_ist_naive() - timedelta(seconds=self.app.config["STREAM_OVERLAP_SECONDS"])
+                self._recent_ids = {
+                    event_id: now_ist_naive()
+                    for (event_id,) in db.session.query(ChangeEvent.id).filter(
+                        ChangeEvent.created_at >= created_since
+                    )
+                }
+            self._subscribers.add(subscription)
+        self._ensure_poller()
+        self._wakeup.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if not self._subscribers:
+                # Nobody to deliver to: stop polling and start afresh from the
+                # newest event when the next dashboard connects.
+                self._last_id = None
+                self._recent_ids = {}
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                "subscribers": len(self._subscribers),
+                "last_event_id": self._last_id,
+            }
+
+    def _ensure_poller(self):
+        # Threads do not survive a fork, so start the poller lazily per process.
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            poller = threading.Thread(target=self._run_poller, name="event-broker", daemon=True)
+            poller.start()
+
+    def _run_poller(self):
+        while True:
+            with self._lock:
+                idle = not self._subscribers
+            if idle:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._poll()
+            except Exception as exc:
+                print(f"Event broker poll failed: {exc}")
+            time.sleep(self.app.config["STREAM_POLL_INTERVAL"])
+
+    def _poll(self):
+        with self._lock:
+            last_id = self._last_id
+        if last_id is None:
+            return
+
+        # Ids are assigned when a transaction writes, not when it commits, so
+        # id N can become visible after N+1 was delivered. Re-read the last
+        # few seconds each poll and skip the ids already sent. The re-read is
+        # a separate query so a busy window cannot use up the limit on new
+        # events and stall the stream.
+        created_since = now_ist_naive() - timedelta(seconds=self.app.config["STREAM_OVERLAP_SECONDS"])
+        with self.app.app_context():
+            try:
+                new_events = events_after(last_id, limit=self.app.config["STREAM_REPLAY_LIMIT"])
+                events = late_events(last_id, created_since) + new_events
+            finally:
+                db.session.remove()
+
+        with self._lock:
+            if self._last_id != last_id:
+                # Everyone unsubscribed (and maybe resubscribed) meanwhile.
+                return
+            # An event delivered before the window opened was also created
+            # before it, so it cannot be re-read and its id can be forgotten.
+            self._recent_ids = {
+                event_id: delivered_at for event_id, delivered_at in self._recent_ids.items()
+                if delivered_at >= created_since
+            }
+            events = [change for change in events if change["id"] not in self._recent_ids]
+            delivered_at = now_ist_naive()
+            for change in events:
+                self._recent_ids[change["id"]] = delivered_at
+            if new_events:
+                self._last_id = new_events[-1]["id"]
+            if not events:
+                return
+            subscribers = list(self._subscribers)
+
+        delivered = overflowed = 0
+        for subscription in subscribers:
+            was_overflowed = subscription.overflowed
+            for change in events:
+                if subscription.wants(change):
+                    subscription.put(change)
+                    delivered += 1
+            if subscription.overflowed and not was_overflowed:
+                overflowed += 1
+
+        with self._lock:
+            self._counters["delivered"] += delivered
+            self._counters["overflowed"] += overflowed
+
+
+event_broker = EventBroker()
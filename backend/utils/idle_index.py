@@ -0,0 +1,76 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time
+
+from utils.datetime_utils import ensure_ist
+
+
+def normalize_username(username):
+    return (username or "").strip().lower()
+
+
+def session_window(login_time, logout_time):
+    """
+    Return the (start, end) IST window a login session attributes idle time to.
+
+    Closed sessions cover [login, logout]. Open sessions only count idle on
+    the login day, so a forgotten logout does not soak up later days.
+    """
+    start = ensure_ist(login_time)
+    if start is None:
+        return None
+
+    end = ensure_ist(logout_time)
+    if end is None:
+        end = datetime.combine(start.date(), time.max, tzinfo=start.tzinfo)
+    return start, end
+
+
+class IdleIndex:
+    """
+    Per-user idle events sorted by time with prefix sums of idle seconds.
+
+    Building is O(n log n) over the idle rows; each window query is two
+    binary searches, so attributing idle to a page of sessions no longer
+    rescans every user's full idle history per log row.
+    """
+
+    def __init__(self):
+        self._times = {}
+        self._prefix = {}
+
+    @classmethod
+    def from_events(cls, events):
+        """Build from an iterable of (username, created_at, idle_seconds)."""
+        grouped = {}
+        for username, created_at, idle_seconds in events:
+            event_time = ensure_ist(created_at)
+            if event_time is None:
+                continue
+            grouped.setdefault(normalize_username(username), []).append(
+                (event_time.timestamp(), idle_seconds or 0)
+            )
+
+        index = cls()
+        for key, entries in grouped.items():
+            entries.sort(key=lambda entry: entry[0])
+            prefix = [0]
+            for _, idle_seconds in entries:
+                prefix.append(prefix[-1] + idle_seconds)
+            index._times[key] = [entry[0] for entry in entries]
+            index._prefix[key] = prefix
+        return index
+
+    def total(self, username, start, end):
+        """Sum idle seconds for ``username`` with events in [start, end]."""
+        key = normalize_username(username)
+        times = self._times.get(key)
+        if not times or start is None or end is None:
+            return 0
+
+        lo = bisect_left(times, start.timestamp())
+        hi = bisect_right(times, end.timestamp())
+        if hi <= lo:
+            return 0
+
+        prefix = self._prefix[key]
+        return prefix[hi] - prefix[lo]
@@ -0,0 +1,55 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when it is installed.
+
+    Output matches the default provider's (sorted keys; datetimes, Decimals
+    and other extras through the same ``default`` hook) except that non-ASCII
+    text is sent as UTF-8 instead of \\u escapes. Calls
+    with extra json.dumps options, values orjson cannot encode (e.g.
+    integers over 64 bits), or a missing orjson use the stdlib path.
+    """
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _encode(self, obj, indent=False):
+        """UTF-8 JSON bytes, or None when the stdlib encoder has to do it."""
+        if orjson is None:
+            return None
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+        except TypeError:
+            return None
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            encoded = self._encode(obj)
+            if encoded is not None:
+                return encoded.decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        encoded = self._encode(obj, indent)
+        if encoded is None:
+            return super().response(obj)
+        return self._app.response_class(encoded + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from config import Config
+from models import (
+    db, Admin, User, Log, Task, DailyReport, WeeklyReport, Tombstone, MentorPerformance,
+)
+from utils.datetime_utils import now_ist_naive, parse_client_datetime
+
+# Re-read rows changed this close to the previous run, for in-flight commits.
+REFRESH_OVERLAP = timedelta(minutes=1)
+COMPLETED_STATUSES = {"completed", "done"}
+
+
+def _normalize_domain(domain):
+    return (domain or "").strip().lower()
+
+
+def _domain_key(column):
+    return func.lower(func.trim(column))
+
+
+def _touched_domains(since):
+    """Domains with task, session, member or report writes since ``since``."""
+    domains = set()
+    for model in (Task, Log, User):
+        domains.update(db.session.execute(
+            select(_domain_key(model.domain)).where(model.updated_at >= since).distinct()
+        ).scalars())
+
+    for report_model in (DailyReport, WeeklyReport):
+        domains.update(db.session.execute(
+            select(_domain_key(User.domain))
+            .join(report_model, report_model.email == User.email)
+            .where(report_model.updated_at >= since)
+            .distinct()
+        ).scalars())
+    return {domain or "" for domain in domains}
+
+
+def _has_deletions(since):
+    """Deleted rows carry no domain, so any of them forces a full rebuild."""
+    return db.session.execute(
+        select(Tombstone.id).where(
+            Tombstone.table_name.in_(("tasks", "logs", "users", "daily_reports", "weekly_reports")),
+            Tombstone.deleted_at >= since,
+        ).limit(1)
+    ).first() is not None
+
+
+def _task_stats(domain, today):
+    stats = {"tasks_total": 0, "tasks_completed": 0, "tasks_checked": 0, "tasks_on_time": 0, "tasks_overdue": 0}
+    rows = db.session.execute(
+        select(Task.status, Task.isChecked, Task.deadline, Task.updated_at)
+        .where(_domain_key(Task.domain) == domain)
+    ).all()
+
+    for status, is_checked, deadline, updated_at in rows:
+        stats["tasks_total"] += 1
+        if is_checked:
+            stats["tasks_checked"] += 1
+
+        due = parse_client_datetime(deadline)
+        due_date = due.date() if due else None
+        if (status or "").strip().lower() in COMPLETED_STATUSES:
+            stats["tasks_completed"] += 1
+            # Tasks have no completed_at; the last write is when the status
+            # was set, which is as close as the schema gets.
+            if due_date and updated_at and updated_at.date() <= due_date:
+                stats["tasks_on_time"] += 1
+        elif due_date and due_date < today:
+            stats["tasks_overdue"] += 1
+    return stats
+
+
+def _report_count(report_model, domain):
+    member_emails = select(User.email).where(_domain_key(User.domain) == domain)
+    return db.session.execute(
+        select(func.count()).select_from(report_model).where(report_model.email.in_(member_emails))
+    ).scalar() or 0
+
+
+def _session_stats(domain, window_start, now):
+    rows = db.session.execute(
+        select(Log.login_time, Log.logout_time, Log.idle_seconds)
+        .where(
+            _domain_key(Log.domain) == domain,
+            func.lower(Log.role) == "user",
+            Log.login_time >= window_start,
+        )
+    ).all()
+
+    session_seconds = idle_seconds = 0
+    for login_time, logout_time, idle in rows:
+        end = logout_time or min(now, login_time.replace(hour=23, minute=59, second=59))
+        session_seconds += max(int((end - login_time).total_seconds()), 0)
+        idle_seconds += idle or 0
+    return {"sessions": len(rows), "session_seconds": session_seconds, "idle_seconds": idle_seconds}
+
+
+def _domain_stats(domain, now):
+    window_start = now - timedelta(days=Config.MENTOR_SESSION_WINDOW_DAYS)
+    stats = _task_stats(domain, now.date())
+    stats.update(_session_stats(domain, window_start, now))
+    stats["members"] = db.session.execute(
+        select(func.count()).select_from(User).where(_domain_key(User.domain) == domain)
+    ).scalar() or 0
+    stats["daily_reports"] = _report_count(DailyReport, domain)
+    stats["weekly_reports"] = _report_count(WeeklyReport, domain)
+
+    # Share of the domain's tasks completed, the figure the mentor card shows.
+    total = stats["tasks_total"]
+    stats["score"] = round(stats["tasks_completed"] / total * 100) if total else 0
+    return stats
+
+
+def refresh_mentor_performance(state, full):
+    """
+    Rollup job: recompute mentor_performance rows.
+
+    Mentors are the Admin rows with role "mentor", measured by their domain.
+    Incremental runs only recompute domains with writes since the previous
+    run (via the updated_at columns); deletions and the periodic full run
+    rebuild every mentor.
+    """
+    now = now_ist_naive()
+    since = state.refreshed_at - REFRESH_OVERLAP if state.refreshed_at else None
+    if since is None or _has_deletions(since):
+        full = True
+    touched = None if full else _touched_domains(since)
+
+    mentors = Admin.query.filter(func.lower(Admin.role) == "mentor").all()
+    existing = {row.admin_id: row for row in MentorPerformance.query.all()}
+    domain_stats = {}
+
+    for mentor in mentors:
+        domain = _normalize_domain(mentor.domain)
+        row = existing.pop(mentor.id, None)
+        mentor_changed = mentor.updated_at is None or since is None or mentor.updated_at >= since
+        if row is not None and touched is not None and domain not in touched and not mentor_changed:
+            continue
+
+        if domain not in domain_stats:
+            domain_stats[domain] = _domain_stats(domain, now)
+
+        if row is None:
+            row = MentorPerformance(admin_id=mentor.id)
+            db.session.add(row)
+        row.name = mentor.username
+        row.domain = mentor.domain
+        for column, value in domain_stats[domain].items():
+            setattr(row, column, value)
+        row.refreshed_at = now
+
+    # Whatever is left is no longer a mentor (deleted or role changed).
+    for row in existing.values():
+        db.session.delete(row)
@@ -0,0 +1,47 @@
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a ?limit= value, clamping it to [1, maximum]. Raises ValueError on junk."""
+    if value in (None, ""):
+        return default
+
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be a positive integer") from None
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def parse_id_cursor(value):
+    """Parse an opaque id cursor. Cursors are the last id of the previous page."""
+    if value in (None, ""):
+        return None
+
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("cursor must be a positive integer") from None
+    if cursor < 1:
+        raise ValueError("cursor must be a positive integer")
+    return cursor
+
+
+def keyset_page(query, id_column, limit, cursor=None):
+    """
+    Fetch one page of ``query`` ordered by ``id_column`` descending.
+
+    Reads ``limit + 1`` rows so ``has_more`` is known without a COUNT(*).
+    Returns ``(rows, next_cursor, has_more)``.
+    """
+    if cursor is not None:
+        query = query.filter(id_column < cursor)
+
+    rows = query.order_by(id_column.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1].id if has_more and rows else None
+    return rows, next_cursor, has_more
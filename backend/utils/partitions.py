@@ -0,0 +1,95 @@
+"""
+Monthly range partitions for the append-heavy tables on Postgres.
+
+Tables converted by ``partition_postgres.py`` are ``PARTITION BY RANGE`` on
+their time column, with one partition per month named ``<table>_pYYYYMM``
+plus ``<table>_default`` for anything outside them. Every helper here is a
+no-op on other databases and on tables that were never converted.
+"""
+import re
+from datetime import datetime
+
+from sqlalchemy import text
+
+# Tables that may be partitioned, and the column their ranges are on.
+PARTITION_COLUMNS = {"activity": "created_at", "logs": "login_time"}
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def is_partitioned(connection, table_name):
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ),
+        {"name": table_name},
+    ).first() is not None
+
+
+def monthly_partitions(connection, table_name):
+    """[(partition name, range start, range end)] of a partitioned table, oldest first."""
+    if not is_partitioned(connection, table_name):
+        return []
+
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :name AND pg_table_is_visible(parent.oid)"
+        ),
+        {"name": table_name},
+    ).scalars()
+
+    pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{4}})(\d{{2}})$")
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            start = datetime(int(match.group(1)), int(match.group(2)), 1)
+            partitions.append((name, start, add_months(start, 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_monthly_partition(connection, table_name, start):
+    """Create the partition for the month starting at ``start`` if it is missing."""
+    start = month_start(start)
+    name = f"{table_name}_p{start:%Y%m}"
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{add_months(start, 1):%Y-%m-%d}')"
+    ))
+    return name
+
+
+def ensure_future_partitions(connection, table_name, now, months_ahead):
+    """
+    Keep this month's and the next ``months_ahead`` months' partitions in
+    place so new rows never land in the default partition.
+    """
+    if not is_partitioned(connection, table_name):
+        return []
+    existing = {start for _, start, _ in monthly_partitions(connection, table_name)}
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(month_start(now), offset)
+        if start not in existing:
+            created.append(create_monthly_partition(connection, table_name, start))
+    return created
+
+
+def drop_partition(connection, table_name, partition_name):
+    """Detach and drop one partition: a catalog change, not a row-by-row delete."""
+    connection.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {partition_name}"))
+    connection.execute(text(f"DROP TABLE {partition_name}"))
@@ -0,0 +1,200 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# Pool processes must not be forked from a threaded gunicorn worker: a child
+# could inherit a lock another request thread held at fork time. The fork
+# server is a clean single-threaded process; Windows and macOS fall back to
+# spawn.
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class PasswordPoolBusy(Exception):
+    """The KDF pool is full or too slow; the caller should answer 503."""
+
+
+def normalize_method(method):
+    """Expand werkzeug shorthands like "scrypt" to the parameters stored in a hash."""
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+def needs_rehash(stored_hash, method):
+    """Whether ``stored_hash`` was made with other KDF parameters than ``method``."""
+    return bool(stored_hash) and stored_hash.split("$", 1)[0] != normalize_method(method)
+
+
+class PasswordHasherPool:
+    """
+    Runs password hashing and verification in a small process pool.
+
+    The KDF is deliberately slow, so running it on the request path lets a
+    burst of logins tie up every worker and stall unrelated endpoints. Each
+    gunicorn worker gets PASSWORD_WORKERS pool processes, started on
+    first use. At most PASSWORD_QUEUE_LIMIT calls may be pending per worker;
+    past that, or after PASSWORD_TIMEOUT_SECONDS, callers get
+    ``PasswordPoolBusy`` instead of queueing behind the burst. With
+    PASSWORD_WORKERS=0 (or outside the app) the KDF runs inline.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {"completed": 0, "rejected": 0, "timed_out": 0}
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["password_pool"] = self
+
+    @property
+    def method(self):
+        return self.app.config["PASSWORD_HASH_METHOD"] if self.app else "scrypt"
+
+    # ── Request side ──
+
+    def is_saturated(self):
+        return self._pooled() and self._in_flight >= self.app.config["PASSWORD_QUEUE_LIMIT"]
+
+    def reject(self):
+        self._increment("rejected")
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        if not stored_hash:
+            return False
+        return self._run(check_password_hash, stored_hash, password)
+
+    def hash_chunked(self, passwords):
+        """
+        Hash a batch on the request path (HTTP imports). Only
+        PASSWORD_IMPORT_CHUNK hashes are queued at a time, through the same
+        bounded queue as logins, so an import cannot starve them; raises
+        ``PasswordPoolBusy`` if logins already fill the queue.
+        """
+        if not self._pooled():
+            return self.hash_many(passwords)
+        chunk_size = max(1, min(self.app.config["PASSWORD_IMPORT_CHUNK"], self.app.config["PASSWORD_QUEUE_LIMIT"]))
+        hashes = []
+        for start in range(0, len(passwords), chunk_size):
+            chunk = passwords[start:start + chunk_size]
+            hashes.extend(self._run_many(generate_password_hash, [(password, self.method) for password in chunk]))
+        return hashes
+
+    def hash_many(self, passwords):
+        """Hash a batch (CLI imports, scripts), spread over the pool and not load-shed."""
+        if not self._pooled():
+            return [generate_password_hash(password, self.method) for password in passwords]
+        return list(self._get_executor().map(generate_password_hash, passwords, repeat(self.method)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": self._in_flight,
+                "queue_limit": self.app.config["PASSWORD_QUEUE_LIMIT"],
+                "workers": self.app.config["PASSWORD_WORKERS"],
+                "method": normalize_method(self.method),
+            }
+
+    # ── Pool side ──
+
+    def _pooled(self):
+        return self.app is not None and self.app.config["PASSWORD_WORKERS"] > 0
+
+    def _increment(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _run(self, fn, *args):
+        return self._run_many(fn, [args])[0]
+
+    def _run_many(self, fn, calls):
+        """Run ``fn(*args)`` for each of ``calls`` in the pool, taking one queue slot per call."""
+        if not self._pooled():
+            return [fn(*args) for args in calls]
+
+        with self._lock:
+            if self._in_flight + len(calls) > self.app.config["PASSWORD_QUEUE_LIMIT"]:
+                self._counters["rejected"] += 1
+                raise PasswordPoolBusy()
+            self._in_flight += len(calls)
+
+        futures = []
+        try:
+            executor = self._get_executor()
+            for args in calls:
+                futures.append(executor.submit(fn, *args))
+        except BaseException as exc:
+            for _ in range(len(calls) - len(futures)):
+                self._release_slot()
+            for future in futures:
+                future.cancel()
+            self._forget_broken_pool(exc)
+            raise
+        finally:
+            # A timed-out call keeps running in the pool (cancel() cannot stop
+            # it), so its slot is only given back once it actually finishes.
+            for future in futures:
+                future.add_done_callback(self._release_slot)
+
+        deadline = time.monotonic() + self.app.config["PASSWORD_TIMEOUT_SECONDS"]
+        try:
+            results = [future.result(timeout=max(0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeout:
+            for future in futures:
+                future.cancel()
+            self._increment("timed_out")
+            raise PasswordPoolBusy() from None
+        except BrokenProcessPool as exc:
+            self._forget_broken_pool(exc)
+            raise
+
+        with self._lock:
+            self._counters["completed"] += len(results)
+        return results
+
+    def _release_slot(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _forget_broken_pool(self, exc):
+        if isinstance(exc, BrokenProcessPool):
+            # A pool process died (e.g. OOM-killed); start a fresh pool next call.
+            with self._lock:
+                self._executor = None
+
+    def _get_executor(self):
+        # A pool does not survive gunicorn's fork, so each worker builds its
+        # own. Children start from a fresh interpreter (see _START_METHOD)
+        # and import the launching script under a non-__main__ name, so
+        # scripts keep their work behind a __main__ guard. They only ever
+        # run werkzeug's KDF functions, sent as (password, method) pairs.
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._started_pid != pid:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.app.config["PASSWORD_WORKERS"],
+                    mp_context=multiprocessing.get_context(_START_METHOD),
+                )
+                self._started_pid = pid
+            return self._executor
+
+
+password_pool = PasswordHasherPool()
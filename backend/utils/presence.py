@@ -0,0 +1,253 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+
+from models import db
+from utils.actor_cache import get_actor
+from utils.datetime_utils import IST, to_ist_iso
+from utils.event_broker import publish_change
+from utils.principals import PRINCIPAL_MODELS
+
+# A worker writes a repeat heartbeat for the same user at most this often.
+_HEARTBEAT_EVERY_SECONDS = 30
+# Offline rows already mirrored to the database are dropped after a day.
+_FORGET_AFTER_SECONDS = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS presence (
+    username TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    principal_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    last_seen REAL NOT NULL,
+    flushed_status TEXT
+)
+"""
+# Online rows not seen within the timeout count as Offline.
+_EFFECTIVE_STATUS = "CASE WHEN status = 'Online' AND last_seen < ? THEN 'Offline' ELSE status END"
+
+
+class PresenceStore:
+    """
+    Presence rows shared by every worker process on this host, kept in a
+    local SQLite file. It stands in for Redis: replacing this class is all
+    a multi-host deployment needs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite3 connections are neither fork- nor thread-safe; keep one per
+        # thread and per process.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def record(self, username, kind, principal_id, status, last_seen):
+        self._connection().execute(
+            "INSERT INTO presence (username, kind, principal_id, status, last_seen) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (username) DO UPDATE SET "
+            "kind = excluded.kind, principal_id = excluded.principal_id, "
+            "status = excluded.status, last_seen = MAX(last_seen, excluded.last_seen)",
+            (username, kind, principal_id, status, last_seen),
+        )
+
+    def rows(self, cutoff):
+        """(username, kind, status, last_seen) for everyone, with expiry applied."""
+        return self._connection().execute(
+            f"SELECT username, kind, {_EFFECTIVE_STATUS}, last_seen FROM presence",
+            (cutoff,),
+        ).fetchall()
+
+    def claim_unflushed(self, cutoff):
+        """
+        (kind, principal_id, status) for rows whose status differs from what
+        was last written to the database, marked as written in the same
+        transaction so two workers never flush the same change.
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            changed = connection.execute(
+                f"SELECT username, kind, principal_id, {_EFFECTIVE_STATUS} AS effective "
+                "FROM presence WHERE flushed_status IS NULL OR flushed_status != "
+                f"{_EFFECTIVE_STATUS}",
+                (cutoff, cutoff),
+            ).fetchall()
+            connection.executemany(
+                "UPDATE presence SET status = ?, flushed_status = ? WHERE username = ?",
+                [(status, status, username) for username, _, _, status in changed],
+            )
+            connection.execute(
+                "DELETE FROM presence WHERE status = 'Offline' AND flushed_status = 'Offline' "
+                "AND last_seen < ?",
+                (time.time() - _FORGET_AFTER_SECONDS,),
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return [(kind, principal_id, status) for _, kind, principal_id, status in changed]
+
+    def unclaim(self, claimed):
+        self._connection().executemany(
+            "UPDATE presence SET flushed_status = NULL WHERE kind = ? AND principal_id = ?",
+            [(kind, principal_id) for kind, principal_id, _ in claimed],
+        )
+
+
+class PresenceTracker:
+    """
+    Online/Offline state for users and admins, kept out of the request path.
+
+    Login, logout and heartbeats from authenticated sessions only write the shared
+    PresenceStore (repeat heartbeats are coalesced in memory first), so no
+    auth event UPDATEs or locks a users/admins row. Users not seen for
+    PRESENCE_TIMEOUT_SECONDS count as Offline. Every PRESENCE_FLUSH_SECONDS
+    a thread in each worker copies status changes into the ``status``
+    columns with one UPDATE per (table, status) and one change event per
+    table, so the DB and list endpoints lag by at most one interval while
+    /api/presence reads the store directly.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.store = None
+        self._lock = threading.Lock()
+        self._last_written = {}
+        self._started_pid = None
+        self._counters = {"writes": 0, "coalesced": 0, "flushed": 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.store = PresenceStore(app.config["PRESENCE_STORE_PATH"])
+        app.extensions["presence"] = self
+        # gunicorn forks after import, so start the flusher on the first
+        # request each worker serves rather than at import time.
+        app.before_request(self._ensure_flusher)
+
+    # ── Request side ──
+
+    def login(self, principal):
+        principal.status = "Online"
+        self._record(principal.username, principal.kind, principal.id, "Online")
+
+    def logout(self, principal):
+        principal.status = "Offline"
+        self._record(principal.username, principal.kind, principal.id, "Offline")
+
+    def heartbeat(self, username):
+        """Mark ``username`` as seen now. Cheap enough to call on every event."""
+        if not username:
+            return
+        with self._lock:
+            last_written = self._last_written.get(username)
+            if last_written is not None and time.monotonic() - last_written < _HEARTBEAT_EVERY_SECONDS:
+                self._counters["coalesced"] += 1
+                return
+
+        actor = get_actor(username)
+        if actor:
+            self._record(username, actor["kind"], actor["id"], "Online")
+
+    def snapshot(self):
+        """Everyone currently Online, as {username, kind, last_seen} dicts."""
+        return [
+            {
+                "username": username,
+                "kind": kind,
+                "last_seen": to_ist_iso(datetime.fromtimestamp(last_seen, IST)),
+            }
+            for username, kind, status, last_seen in self.store.rows(self._cutoff())
+            if status == "Online"
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "tracked_here": len(self._last_written)}
+
+    def _record(self, username, kind, principal_id, status):
+        try:
+            self.store.record(username, kind, principal_id, status, time.time())
+        except sqlite3.Error as exc:
+            # Presence is advisory; never fail a login or an upload over it.
+            print(f"Presence update for {username} failed: {exc}")
+            return
+        with self._lock:
+            if status == "Online":
+                self._last_written[username] = time.monotonic()
+            else:
+                # The next heartbeat after a logout must not be coalesced away.
+                self._last_written.pop(username, None)
+            self._counters["writes"] += 1
+
+    def _cutoff(self):
+        return time.time() - self.app.config["PRESENCE_TIMEOUT_SECONDS"]
+
+    # ── Flush side ──
+
+    def flush(self):
+        """Write pending status changes to the database. Needs an app context."""
+        claimed = self.store.claim_unflushed(self._cutoff())
+        if not claimed:
+            return 0
+
+        ids = {}
+        for kind, principal_id, status in claimed:
+            ids.setdefault((kind, status), []).append(principal_id)
+        try:
+            for (kind, status), principal_ids in ids.items():
+                model = PRINCIPAL_MODELS[kind]
+                db.session.execute(update(model).where(model.id.in_(principal_ids)).values(status=status))
+            for kind in sorted({kind for kind, _ in ids}):
+                publish_change(f"{kind}s", "updated")
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.store.unclaim(claimed)
+            raise
+
+        with self._lock:
+            self._counters["flushed"] += len(claimed)
+        return len(claimed)
+
+    def _ensure_flusher(self):
+        # Threads do not survive a fork, so each worker starts its own.
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            # Coalescing state inherited from the parent is not this worker's.
+            self._last_written = {}
+            flusher = threading.Thread(target=self._run_flusher, name="presence-flush", daemon=True)
+            flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.app.config["PRESENCE_FLUSH_SECONDS"])
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception as exc:
+                    print(f"Presence flush failed: {exc}")
+                finally:
+                    db.session.remove()
+
+
+presence = PresenceTracker()
@@ -0,0 +1,153 @@
+from sqlalchemy import literal_column, or_, select, union_all, update
+
+from config import Config
+from models import db, Admin, User
+from utils.passwords import PasswordPoolBusy, needs_rehash, password_pool
+from utils.ttl_cache import TTLCache
+
+# Admins win when the same username/email exists in both tables, matching the
+# order the auth routes have always checked them in.
+PRINCIPAL_MODELS = {"admin": Admin, "user": User}
+_PRIORITY = {"admin": 0, "user": 1}
+
+_COLUMNS = (
+    "id", "custom_id", "username", "email", "password", "role",
+    "domain", "designation", "status", "profile_version",
+)
+
+
+class Principal:
+    """
+    A row from either the admins or users table, tagged with which one.
+
+    ``id`` alone is ambiguous (both tables have their own sequences), so
+    callers that store a principal reference must keep ``kind`` with it.
+    """
+
+    __slots__ = ("kind",) + _COLUMNS
+
+    def __init__(self, kind, **values):
+        self.kind = kind
+        for column in _COLUMNS:
+            setattr(self, column, values.get(column))
+
+    @property
+    def model(self):
+        return PRINCIPAL_MODELS[self.kind]
+
+    def check_password(self, password):
+        return password_pool.verify(self.password, password)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "custom_id": self.custom_id,
+            "username": self.username,
+            "email": self.email,
+            "role": self.role,
+            "domain": self.domain,
+            "designation": self.designation,
+            "status": self.status
+        }
+
+
+def _select(kind, condition):
+    model = PRINCIPAL_MODELS[kind]
+    return select(
+        # Inline constants rather than bind params so every dialect can type
+        # the UNION columns.
+        literal_column(f"'{kind}'").label("kind"),
+        literal_column(str(_PRIORITY[kind])).label("priority"),
+        *(getattr(model, column).label(column) for column in _COLUMNS),
+    ).where(condition(model))
+
+
+def _first(condition):
+    """Resolve across both tables in one UNION ALL round-trip."""
+    statement = union_all(*(_select(kind, condition) for kind in PRINCIPAL_MODELS))
+    statement = select(statement.subquery()).order_by("priority").limit(1)
+    row = db.session.execute(statement).mappings().first()
+    if row is None:
+        return None
+    return Principal(row["kind"], **{column: row[column] for column in _COLUMNS})
+
+
+def find_principal(identifier):
+    """Look up a principal by username or email (the login identifier)."""
+    if not identifier:
+        return None
+    return _first(lambda model: or_(model.username == identifier, model.email == identifier))
+
+
+def find_principal_by_username(username):
+    if not username:
+        return None
+    return _first(lambda model: model.username == username)
+
+
+def get_principal(kind, principal_id):
+    """Fetch by (kind, id). Without a kind, falls back to admin-then-user."""
+    if principal_id is None:
+        return None
+    if kind in PRINCIPAL_MODELS:
+        row = db.session.execute(_select(kind, lambda model: model.id == principal_id)).mappings().first()
+        return Principal(kind, **{column: row[column] for column in _COLUMNS}) if row else None
+    return _first(lambda model: model.id == principal_id)
+
+
+def upgrade_password_hash(principal, password):
+    """
+    Re-hash a just-verified password whose hash predates the current
+    PASSWORD_HASH_METHOD, in the caller's transaction. Skipped when the
+    pool is busy; the next login tries again.
+    """
+    if not needs_rehash(principal.password, password_pool.method):
+        return False
+    try:
+        new_hash = password_pool.hash(password)
+    except PasswordPoolBusy:
+        return False
+    model = principal.model
+    db.session.execute(update(model).where(model.id == principal.id).values(password=new_hash))
+    principal.password = new_hash
+    return True
+
+
+# ── Signed-session snapshots ──
+
+profile_versions = TTLCache(
+    ttl=Config.SESSION_VERSION_TTL,
+    max_size=Config.SESSION_VERSION_CACHE_SIZE,
+)
+
+
+def session_snapshot(principal):
+    """
+    What the signed session cookie carries so /session needs no row fetch.
+    Online status is left out: it changes without a profile_version bump,
+    so a copy in the cookie would go stale (/api/presence serves it).
+    """
+    snapshot = principal.to_dict()
+    snapshot.pop("status")
+    return {
+        **snapshot,
+        "kind": principal.kind,
+        "profile_version": principal.profile_version or 1,
+    }
+
+
+def _load_profile_version(key):
+    kind, principal_id = key
+    model = PRINCIPAL_MODELS[kind]
+    return db.session.execute(
+        select(model.profile_version).where(model.id == principal_id)
+    ).scalar()
+
+
+def current_profile_version(kind, principal_id):
+    """Cached profile_version for a principal, or None if it no longer exists."""
+    return profile_versions.get((kind, principal_id), _load_profile_version)
+
+
+def invalidate_profile_version(kind, principal_id):
+    profile_versions.invalidate((kind, principal_id))
@@ -0,0 +1,139 @@
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import select
+
+from config import Config
+from models import db, Activity, Log
+from utils.archive import write_archive
+from utils.datetime_utils import now_ist_naive
+from utils.delta_sync import record_deletion
+from utils.event_broker import publish_change
+from utils.partitions import (
+    PARTITION_COLUMNS, drop_partition, ensure_future_partitions, monthly_partitions,
+)
+from utils.screenshot_store import release_screenshot
+
+# Table name -> (model, Config setting holding its retention in days).
+RETENTION_POLICIES = {
+    "activity": (Activity, "ACTIVITY_RETENTION_DAYS"),
+    "logs": (Log, "LOG_RETENTION_DAYS"),
+}
+
+
+def retention_cutoff(days, now):
+    """
+    Rows before this expire; None when retention is off. Day-aligned, so
+    rows expire in one sweep a day instead of a trickle on every run.
+    """
+    if days <= 0:
+        return None
+    return datetime.combine((now - timedelta(days=days)).date(), time.min)
+
+
+def _fetch_batch(table, time_column, after_id, start, end, limit):
+    column = table.c[time_column]
+    conditions = [table.c.id > after_id, column < end]
+    if start is not None:
+        conditions.append(column >= start)
+    return [
+        dict(row)
+        for row in db.session.execute(
+            select(table).where(*conditions).order_by(table.c.id.asc()).limit(limit)
+        ).mappings()
+    ]
+
+
+def _release_screenshots(table_name, rows):
+    # Archives keep the path but not the image; the blob goes once unreferenced.
+    # restore_archive takes the reference back if the blob is still there.
+    if table_name == "activity":
+        for row in rows:
+            if row["screenshot_path"]:
+                release_screenshot(row["screenshot_path"])
+
+
+def drop_expired_partitions(table_name, cutoff, folder, batch_size):
+    """
+    Archive then drop every monthly partition that ends before ``cutoff``.
+    Rows are still read out in batches for the archive, but removing them is
+    a DROP rather than a DELETE. Returns the number of rows archived.
+    """
+    table = RETENTION_POLICIES[table_name][0].__table__
+    time_column = PARTITION_COLUMNS[table_name]
+    archived = 0
+
+    for name, start, end in monthly_partitions(db.session.connection(), table_name):
+        if end > cutoff:
+            break
+        last_id = 0
+        while True:
+            rows = _fetch_batch(table, time_column, last_id, start, end, batch_size)
+            if not rows:
+                break
+            write_archive(folder, table, rows, time_column)
+            _release_screenshots(table_name, rows)
+            last_id = rows[-1]["id"]
+            archived += len(rows)
+        drop_partition(db.session.connection(), table_name, name)
+        publish_change(table_name, "archived")
+        db.session.commit()
+        print(f"Retention: dropped partition {name}.")
+    return archived
+
+
+def archive_expired_rows(table_name, cutoff, folder, batch_size, max_batches):
+    """
+    Archive and delete rows older than ``cutoff``, ``batch_size`` rows per
+    transaction and at most ``max_batches`` per call, so no single DELETE
+    holds locks for long. Each batch's archive is on disk before its delete
+    commits. Returns the number of rows archived.
+    """
+    table = RETENTION_POLICIES[table_name][0].__table__
+    time_column = PARTITION_COLUMNS[table_name]
+    archived = 0
+
+    for _ in range(max_batches):
+        rows = _fetch_batch(table, time_column, 0, None, cutoff, batch_size)
+        if not rows:
+            break
+        write_archive(folder, table, rows, time_column)
+        _release_screenshots(table_name, rows)
+        db.session.execute(table.delete().where(table.c.id.in_([row["id"] for row in rows])))
+        publish_change(table_name, "archived")
+        db.session.commit()
+        archived += len(rows)
+    return archived
+
+
+def apply_retention(state, full):
+    """
+    Rollup job: move expired Activity and Log rows to archives.
+
+    Tables partitioned by partition_postgres.py also get their upcoming
+    monthly partitions created and whole expired months dropped; anything
+    left (the current month's tail, the default partition, other databases)
+    goes through the batched delete. ``full`` makes no difference here.
+    """
+    now = now_ist_naive()
+    for table_name, (_, setting) in RETENTION_POLICIES.items():
+        ensure_future_partitions(db.session.connection(), table_name, now, Config.PARTITION_MONTHS_AHEAD)
+        db.session.commit()
+
+        cutoff = retention_cutoff(getattr(Config, setting), now)
+        if cutoff is None:
+            continue
+
+        archived = drop_expired_partitions(
+            table_name, cutoff, Config.ARCHIVE_FOLDER, Config.RETENTION_BATCH_SIZE
+        )
+        archived += archive_expired_rows(
+            table_name, cutoff, Config.ARCHIVE_FOLDER,
+            Config.RETENTION_BATCH_SIZE, Config.RETENTION_MAX_BATCHES,
+        )
+        if not archived:
+            continue
+
+        # Too many rows for per-row tombstones: ask ?since= clients to reload.
+        record_deletion(table_name, "*")
+        db.session.commit()
+        print(f"Retention: archived {archived} {table_name} row(s) from before {cutoff:%Y-%m-%d}.")
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from datetime import timedelta
+
+from flask import request
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, RollupState
+from utils.datetime_utils import now_ist_naive
+
+
+def _ensure_state(name):
+    if db.session.get(RollupState, name) is not None:
+        return
+    db.session.add(RollupState(name=name))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created it first.
+        db.session.rollback()
+
+
+def acquire_lease(name, seconds):
+    """
+    Claim job ``name`` for ``seconds`` with one conditional UPDATE. Returns
+    True for exactly one caller per lease, whichever worker gets there first.
+    """
+    _ensure_state(name)
+    now = now_ist_naive()
+    result = db.session.execute(
+        update(RollupState)
+        .where(
+            RollupState.name == name,
+            or_(RollupState.lease_until.is_(None), RollupState.lease_until <= now),
+        )
+        .values(lease_until=now + timedelta(seconds=seconds))
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+class RollupScheduler:
+    """
+    Runs registered rollup jobs on a background thread in each worker.
+
+    A job is ``fn(state, full)`` where ``state`` is its RollupState row and
+    ``full`` asks for a rebuild instead of an incremental pass; it updates
+    its tables and ``state`` and the scheduler commits. The lease taken in
+    ``acquire_lease`` keeps workers from repeating each other's runs.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._started_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["rollup_scheduler"] = self
+        if app.config["ROLLUP_JOBS_ENABLED"]:
+            # gunicorn forks after import, so start the thread on the first
+            # request each worker serves rather than at import time.
+            app.before_request(self._ensure_worker)
+
+    def register(self, name, job):
+        self._jobs[name] = job
+
+    def run(self, name, force_full=False):
+        """
+        Run one job now if no other worker holds its lease. Needs an app
+        context. Returns True if this call did the work.
+        """
+        interval = self.app.config["ROLLUP_INTERVAL_SECONDS"]
+        if not acquire_lease(name, interval):
+            return False
+
+        try:
+            state = db.session.get(RollupState, name)
+            now = now_ist_naive()
+            full_every = timedelta(hours=self.app.config["ROLLUP_FULL_REFRESH_HOURS"])
+            full = (
+                force_full
+                or state.full_refreshed_at is None
+                or state.full_refreshed_at <= now - full_every
+            )
+            self._jobs[name](state, full)
+            state.refreshed_at = now
+            if full:
+                state.full_refreshed_at = now
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Let the next tick retry rather than waiting out the lease.
+            db.session.execute(
+                update(RollupState).where(RollupState.name == name).values(lease_until=None)
+            )
+            db.session.commit()
+            raise
+        return True
+
+    def _ensure_worker(self):
+        if request.method == "OPTIONS":
+            return None
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return None
+
+        with self._lock:
+            if self._started_pid == pid:
+                return None
+            self._started_pid = pid
+            worker = threading.Thread(target=self._run_worker, name="rollup-scheduler", daemon=True)
+            worker.start()
+        return None
+
+    def _run_worker(self):
+        while True:
+            for name in list(self._jobs):
+                with self.app.app_context():
+                    try:
+                        self.run(name)
+                    except Exception as exc:
+                        print(f"Rollup job {name} failed: {exc}")
+                    finally:
+                        db.session.remove()
+            time.sleep(self.app.config["ROLLUP_INTERVAL_SECONDS"])
+
+
+rollup_scheduler = RollupScheduler()
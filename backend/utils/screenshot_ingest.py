@@ -0,0 +1,385 @@
+import base64
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+import uuid
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ScreenshotTooLarge(Exception):
+    pass
+
+
+class ScreenshotIngestPool:
+    """
+    Decodes spooled screenshot uploads on background threads.
+
+    The request thread only writes the raw base64 payload to the spool folder
+    and enqueues the owning Activity id. Workers decode, optionally recompress,
+    write the PNG into the screenshot folder and set Activity.screenshot_path.
+    The queue is bounded; callers ``reserve()`` a slot per screenshot before
+    committing and shed load when that fails. Spool files that never made it
+    into the queue are re-queued by a sweep every SCREENSHOT_SWEEP_SECONDS.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = None
+        self._lock = threading.Lock()
+        self._started_pid = None
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._counters = {
+            "queued": 0,
+            "processed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "recovered": 0,
+            "dead_lettered": 0,
+        }
+        self._in_flight = 0
+        self._reserved = 0
+        self._pending = set()
+
+    def init_app(self, app):
+        self.app = app
+        self._queue = queue.Queue(maxsize=app.config["SCREENSHOT_QUEUE_SIZE"])
+        os.makedirs(app.config["SCREENSHOT_SPOOL_FOLDER"], exist_ok=True)
+        app.extensions["screenshot_ingest"] = self
+
+    # ── Request side ──
+
+    def spool_path(self, activity_id):
+        return os.path.join(self.app.config["SCREENSHOT_SPOOL_FOLDER"], f"{activity_id}.b64")
+
+    def spool(self, activity_id, payload):
+        """Write the still-encoded payload to the spool folder."""
+        if isinstance(payload, str):
+            payload = payload.encode("ascii")
+
+        path = self.spool_path(activity_id)
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return path
+
+    def is_saturated(self):
+        with self._lock:
+            return self._queue.qsize() + self._reserved >= self._queue.maxsize
+
+    def reserve(self, count):
+        """
+        Hold ``count`` queue slots for screenshots about to be committed and
+        submitted with ``reserved=True``. Returns False if they are not free.
+        """
+        with self._lock:
+            if self._queue.qsize() + self._reserved + count > self._queue.maxsize:
+                return False
+            self._reserved += count
+            return True
+
+    def release(self, count):
+        """Give back reserved slots that were not used by ``submit``."""
+        with self._lock:
+            self._reserved = max(0, self._reserved - count)
+
+    def reject(self):
+        self._increment("rejected")
+
+    def submit(self, activity_id, reserved=False):
+        """
+        Hand a spooled screenshot to the workers, on a slot taken by
+        ``reserve`` if ``reserved``. Returns False if the queue filled up
+        meanwhile; the spool file is then picked up by a later sweep (within
+        two SCREENSHOT_SWEEP_SECONDS) instead of being lost.
+        """
+        self._ensure_workers()
+        if not self._enqueue(activity_id, reserved):
+            self._increment("rejected")
+            return False
+
+        self._increment("queued")
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": self._in_flight,
+                "queue_depth": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "workers": self.app.config["SCREENSHOT_WORKERS"],
+            }
+
+    # ── Worker side ──
+
+    def _increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _enqueue(self, activity_id, reserved=False):
+        with self._lock:
+            if reserved:
+                self._reserved = max(0, self._reserved - 1)
+            elif self._queue.qsize() + self._reserved >= self._queue.maxsize:
+                # Slots promised to a request that is still committing.
+                return False
+            if activity_id in self._pending:
+                return True
+            try:
+                self._queue.put_nowait(activity_id)
+            except queue.Full:
+                return False
+            self._pending.add(activity_id)
+            return True
+
+    def _ensure_workers(self):
+        # Threads do not survive a fork, so start them lazily per process
+        # (gunicorn imports the app in the master before forking workers).
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            for index in range(self.app.config["SCREENSHOT_WORKERS"]):
+                worker = threading.Thread(
+                    target=self._run_worker,
+                    name=f"screenshot-ingest-{index}",
+                    daemon=True,
+                )
+                worker.start()
+
+        self._sweep()
+
+    def _claimed_path(self, activity_id, pid):
+        return os.path.join(self.app.config["SCREENSHOT_SPOOL_FOLDER"], f"{activity_id}.{pid}.claimed")
+
+    def _claim(self, activity_id):
+        """
+        Rename the spool file to a name owned by this process. The rename is
+        atomic, so when several workers queue the same file only one gets to
+        process it. Returns the claimed path, or None if someone else won.
+        """
+        claimed_path = self._claimed_path(activity_id, os.getpid())
+        try:
+            os.rename(self.spool_path(activity_id), claimed_path)
+        except FileNotFoundError:
+            return None
+        return claimed_path
+
+    def _dead_letter(self, activity_id, claimed_path):
+        """Park a file that failed so restarts do not retry it forever."""
+        failed_folder = os.path.join(self.app.config["SCREENSHOT_SPOOL_FOLDER"], "failed")
+        os.makedirs(failed_folder, exist_ok=True)
+        try:
+            os.replace(claimed_path, os.path.join(failed_folder, f"{activity_id}.b64"))
+        except FileNotFoundError:
+            return
+        self._increment("dead_lettered")
+
+    def _sweep(self):
+        """Run ``_recover_spool`` on one thread, at most once per SCREENSHOT_SWEEP_SECONDS."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if self._last_sweep and now - self._last_sweep < self.app.config["SCREENSHOT_SWEEP_SECONDS"]:
+                return
+            self._last_sweep = now
+            self._recover_spool()
+        except OSError as exc:
+            print(f"Screenshot spool sweep failed: {exc}")
+        finally:
+            self._sweep_lock.release()
+
+    def _recover_spool(self):
+        spool_folder = self.app.config["SCREENSHOT_SPOOL_FOLDER"]
+        # Younger files may belong to a request that has not committed yet
+        # (or has, and is about to submit them itself).
+        settled_before = time.time() - self.app.config["SCREENSHOT_SWEEP_SECONDS"]
+        # Claims left by a worker that died mid-file go back to the spool.
+        for name in os.listdir(spool_folder):
+            parts = name.split(".")
+            if len(parts) != 3 or parts[2] != "claimed" or not parts[0].isdigit() or not parts[1].isdigit():
+                continue
+            if int(parts[1]) == os.getpid() or _process_alive(int(parts[1])):
+                continue
+            try:
+                os.rename(os.path.join(spool_folder, name), self.spool_path(int(parts[0])))
+            except FileNotFoundError:
+                pass
+
+        for name in sorted(os.listdir(spool_folder)):
+            stem, ext = os.path.splitext(name)
+            if ext != ".b64" or not stem.isdigit():
+                continue
+            try:
+                if os.path.getmtime(os.path.join(spool_folder, name)) > settled_before:
+                    continue
+            except FileNotFoundError:
+                continue
+            if int(stem) in self._pending:
+                continue
+            if not self._enqueue(int(stem)):
+                break
+            self._increment("recovered")
+
+    def _run_worker(self):
+        while True:
+            # Wake up at least once per sweep interval so files that were not
+            # queued get picked up even while no new uploads arrive.
+            self._sweep()
+            try:
+                activity_id = self._queue.get(timeout=self.app.config["SCREENSHOT_SWEEP_SECONDS"])
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._in_flight += 1
+            try:
+                self._process(activity_id)
+                self._increment("processed")
+            except Exception as exc:
+                self._increment("failed")
+                print(f"Screenshot ingest failed for activity {activity_id}: {exc}")
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._pending.discard(activity_id)
+                self._queue.task_done()
+
+    def _process(self, activity_id):
+        from models import db, Activity
+        from utils.event_broker import publish_change
+        from utils.screenshot_store import add_screenshot, release_screenshot
+
+        claimed_path = self._claim(activity_id)
+        if claimed_path is None:
+            # Already processed, or another worker process picked it up.
+            return
+
+        with self.app.app_context():
+            try:
+                activity = Activity.query.get(activity_id)
+                if activity is None:
+                    _remove_quietly(claimed_path)
+                    return
+
+                with open(claimed_path, "rb") as f:
+                    image_bytes = base64.b64decode(f.read())
+
+                # Key on the bytes the agent sent so identical frames dedupe
+                # regardless of recompression settings.
+                digest = hashlib.sha256(image_bytes).hexdigest()
+                if self.app.config["SCREENSHOT_RECOMPRESS"]:
+                    image_bytes = _recompress_png(image_bytes)
+
+                folder = self.app.config["SCREENSHOT_FOLDER"]
+                tmp_path = _write_temp(folder, image_bytes)
+                file_path = add_screenshot(
+                    folder,
+                    digest,
+                    tmp_path,
+                    len(image_bytes),
+                    self.app.config["SCREENSHOT_THUMBNAIL_SIZE"],
+                )
+
+                if activity.screenshot_path:
+                    release_screenshot(activity.screenshot_path)
+                activity.screenshot_path = file_path
+                publish_change("activity", "updated", activity_id)
+                db.session.commit()
+                _remove_quietly(claimed_path)
+            except Exception:
+                db.session.rollback()
+                self._dead_letter(activity_id, claimed_path)
+                raise
+            finally:
+                db.session.remove()
+
+
+def stream_screenshot(folder, stream, max_bytes):
+    """
+    Copy an upload stream to a temporary file in ``folder`` in fixed-size
+    chunks, never holding the whole image in memory, hashing as it goes.
+    Returns ``(tmp_path, sha256_hex, size_bytes)`` for
+    ``screenshot_store.add_screenshot``. Raises ScreenshotTooLarge past
+    ``max_bytes``.
+    """
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f"upload-{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    written = 0
+
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                chunk = stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise ScreenshotTooLarge(f"Screenshot exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+        if not written:
+            raise ValueError("Screenshot body is empty")
+    except Exception:
+        _remove_quietly(tmp_path)
+        raise
+
+    return tmp_path, digest.hexdigest(), written
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _write_temp(folder, image_bytes):
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f"ingest-{uuid.uuid4().hex}.part")
+    with open(tmp_path, "wb") as f:
+        f.write(image_bytes)
+    return tmp_path
+
+
+def _recompress_png(image_bytes):
+    """Re-encode as an optimized PNG when Pillow is installed; otherwise a no-op."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return image_bytes
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            output = io.BytesIO()
+            image.save(output, format="PNG", optimize=True)
+    except Exception:
+        return image_bytes
+
+    recompressed = output.getvalue()
+    return recompressed if len(recompressed) < len(image_bytes) else image_bytes
+
+
+screenshot_ingest = ScreenshotIngestPool()
@@ -0,0 +1,170 @@
+import os
+
+from sqlalchemy import select
+
+from models import db, ScreenshotBlob
+from models.screenshot import digest_from_path
+from utils.sql import insert_or_increment
+
+THUMBNAIL_SUFFIX = "_thumb.jpg"
+# Blob files are renamed to this while their row is being deleted.
+DELETING_SUFFIX = ".deleting"
+
+
+def blob_paths(folder, digest):
+    """Sharded ``<folder>/ab/cd/<digest>.png`` path plus its thumbnail path."""
+    shard = os.path.join(folder, digest[:2], digest[2:4])
+    return (
+        os.path.join(shard, f"{digest}.png"),
+        os.path.join(shard, f"{digest}{THUMBNAIL_SUFFIX}"),
+    )
+
+
+def add_screenshot(folder, digest, source_path, size_bytes, thumbnail_size):
+    """
+    Store the file at ``source_path`` under its content digest and take one
+    reference on it. Identical frames (idle desktops, lock screens) share a
+    single file; the temp file is discarded when the content is already
+    stored. Returns the path to record on Activity.screenshot_path.
+
+    The reference is taken before the files are looked at: the upsert holds
+    the blob row until the caller commits, so a concurrent
+    ``collect_unreferenced_screenshots`` either sees the new reference or
+    has already moved the old file away, and it is written again here.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    path, thumbnail_path = blob_paths(folder, digest)
+    insert_or_increment(
+        ScreenshotBlob,
+        {
+            "digest": digest,
+            "path": path,
+            "thumbnail_path": None,
+            "size_bytes": size_bytes,
+            "ref_count": 1,
+        },
+        "ref_count",
+    )
+
+    if os.path.exists(path):
+        os.remove(source_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    if not os.path.exists(thumbnail_path):
+        thumbnail_path = _make_thumbnail(path, thumbnail_path, thumbnail_size)
+    if thumbnail_path:
+        ScreenshotBlob.query.filter(
+            ScreenshotBlob.digest == digest, ScreenshotBlob.thumbnail_path.is_(None)
+        ).update({ScreenshotBlob.thumbnail_path: thumbnail_path}, synchronize_session=False)
+    return path
+
+
+def release_screenshot(path):
+    """Drop one reference taken by ``add_screenshot``. Legacy flat paths are ignored."""
+    digest = digest_from_path(path)
+    if digest is None:
+        return
+
+    ScreenshotBlob.query.filter_by(digest=digest).update(
+        {ScreenshotBlob.ref_count: ScreenshotBlob.ref_count - 1},
+        synchronize_session=False,
+    )
+
+
+def retain_screenshot(path):
+    """
+    Take one more reference on an existing blob (restoring an archived row).
+    Returns False if the blob has already been collected. Legacy flat paths
+    are not counted and always kept.
+    """
+    digest = digest_from_path(path)
+    if digest is None:
+        return True
+
+    # The UPDATE waits on the row lock collect_unreferenced_screenshots holds,
+    # so the blob is either still there and now referenced, or already gone.
+    return ScreenshotBlob.query.filter_by(digest=digest).update(
+        {ScreenshotBlob.ref_count: ScreenshotBlob.ref_count + 1},
+        synchronize_session=False,
+    ) > 0
+
+
+def collect_unreferenced_screenshots():
+    """
+    Delete blobs no Activity points at any more. Returns the count.
+
+    Commits once per blob, so call it after committing other work. Each
+    blob row is locked and its ref_count re-checked first. Its files are
+    renamed aside before the row is deleted and only unlinked after the
+    commit (or put back if it fails), so a rollback never leaves rows
+    without files.
+    """
+    digests = db.session.execute(
+        select(ScreenshotBlob.digest).where(ScreenshotBlob.ref_count <= 0)
+    ).scalars().all()
+
+    collected = 0
+    for digest in digests:
+        blob = db.session.execute(
+            select(ScreenshotBlob)
+            .where(ScreenshotBlob.digest == digest, ScreenshotBlob.ref_count <= 0)
+            .with_for_update()
+        ).scalar_one_or_none()
+        if blob is None:
+            # Referenced again since the scan.
+            db.session.rollback()
+            continue
+
+        moved = []
+        try:
+            for path in (blob.path, blob.thumbnail_path):
+                if path and os.path.exists(path):
+                    os.replace(path, path + DELETING_SUFFIX)
+                    moved.append(path)
+            db.session.delete(blob)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for path in moved:
+                os.replace(path + DELETING_SUFFIX, path)
+            raise
+
+        for path in moved:
+            try:
+                os.remove(path + DELETING_SUFFIX)
+            except FileNotFoundError:
+                pass
+        collected += 1
+    return collected
+
+
+def collect_screenshot_blobs(state, full):
+    """
+    Rollup job: delete blobs released down to no references since the last
+    run, whether by re-ingest, upload replacement or retention. ``full``
+    makes no difference here.
+    """
+    collected = collect_unreferenced_screenshots()
+    if collected:
+        print(f"Screenshot GC: removed {collected} unreferenced blob(s).")
+
+
+def _make_thumbnail(path, thumbnail_path, size):
+    """Write a small JPEG preview when Pillow is installed; returns its path or None."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(path) as image:
+            image.thumbnail((size, size))
+            image.convert("RGB").save(thumbnail_path, format="JPEG", quality=70)
+    except Exception as exc:
+        print(f"Thumbnail generation failed for {path}: {exc}")
+        return None
+
+    return thumbnail_path
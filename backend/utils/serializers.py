@@ -0,0 +1,20 @@
+def column_query(model, query):
+    """
+    ``query`` narrowed to ``model.SERIALIZED_COLUMNS``. It yields plain row
+    tuples rather than ORM instances, so large lists skip identity-map
+    bookkeeping and never load columns the response does not use.
+    """
+    return query.with_entities(*(getattr(model, name) for name in model.SERIALIZED_COLUMNS))
+
+
+def serialize_rows(model, rows):
+    """
+    ``to_dict`` output for rows from ``column_query``. The models' ``to_dict``
+    only reads attributes, so it runs unbound on the rows' named fields.
+    """
+    to_dict = model.to_dict
+    return [to_dict(row) for row in rows]
+
+
+def serialize_query(model, query):
+    return serialize_rows(model, column_query(model, query))
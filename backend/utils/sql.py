@@ -0,0 +1,33 @@
+from models import db
+
+
+def insert_or_increment(model, values, column, amount=1, connection=None):
+    """
+    INSERT ``values`` into ``model``'s table, or add ``amount`` to ``column``
+    if a row with the same primary key already exists, as one atomic
+    statement on SQLite, Postgres and MySQL.
+
+    Runs inside the caller's transaction (on ``connection`` if given, else
+    the session); nothing is committed here.
+    """
+    executor = connection if connection is not None else db.session
+    table = model.__table__
+    dialect = (connection or db.session.get_bind()).dialect.name
+    increment = {column: getattr(table.c, column) + amount}
+
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(**values).on_conflict_do_update(
+            index_elements=[key.name for key in table.primary_key],
+            set_=increment,
+        )
+    elif dialect in {"mysql", "mariadb"}:
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(**values).on_duplicate_key_update(**increment)
+    else:
+        raise NotImplementedError(f"insert_or_increment does not support {dialect}")
+
+    executor.execute(statement)
@@ -0,0 +1,124 @@
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from sqlalchemy import and_, or_
+
+from models import Activity, Log
+from utils.datetime_utils import now_ist_naive, parse_client_datetime, parse_time_arg, to_ist_iso
+from utils.serializers import column_query
+
+# Activity login/logout rows repeat what the session entries already show,
+# so they are only included when asked for with ?types=.
+DEFAULT_TYPES = ("session", "idle", "app_usage", "screenshot")
+TIMELINE_TYPES = DEFAULT_TYPES + ("login", "logout")
+# Default window when ?from= is omitted.
+DEFAULT_SPAN = timedelta(days=7)
+
+# Entries are ordered newest first by (time, stream, id); the stream number
+# breaks ties between a session and an event at the same instant.
+_SESSIONS, _ACTIVITY = 0, 1
+
+
+def parse_types(raw):
+    if not raw:
+        return set(DEFAULT_TYPES)
+    types = {value.strip() for value in raw.split(",") if value.strip()}
+    unknown = types - set(TIMELINE_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown types: {', '.join(sorted(unknown))}")
+    return types
+
+
+def parse_timeline_cursor(value):
+    """
+    Cursors are "<time>|<stream>|<id>" of the previous page's last entry,
+    the time as naive IST ISO so the cursor has no "+" to escape in a URL.
+    """
+    if not value:
+        return None
+    parts = value.split("|")
+    moment = parse_client_datetime(parts[0]) if len(parts) == 3 else None
+    if moment is None or not parts[1].isdigit() or not parts[2].isdigit():
+        raise ValueError("cursor is invalid")
+    return moment.replace(tzinfo=None), int(parts[1]), int(parts[2])
+
+
+def _older_than(cursor, stream, time_column, id_column):
+    """Rows of ``stream`` that sort after ``cursor`` in newest-first order."""
+    cursor_time, cursor_stream, cursor_id = cursor
+    if stream < cursor_stream:
+        return time_column <= cursor_time
+    if stream > cursor_stream:
+        return time_column < cursor_time
+    return or_(time_column < cursor_time, and_(time_column == cursor_time, id_column < cursor_id))
+
+
+def _stream(model, stream, time_column, conditions, cursor, limit):
+    """Up to ``limit`` rows of one source, newest first, as (time, stream, id, row)."""
+    if cursor is not None:
+        conditions.append(_older_than(cursor, stream, time_column, model.id))
+    query = column_query(model, model.query.filter(*conditions))
+    rows = query.order_by(time_column.desc(), model.id.desc()).limit(limit).all()
+    time_name = time_column.key
+    return [(getattr(row, time_name), stream, row.id, row) for row in rows]
+
+
+def user_timeline(username, start, end, types, limit, cursor=None):
+    """
+    One page of ``username``'s Log sessions and Activity events between
+    ``start`` and ``end``, newest first. Returns (items, next_cursor).
+
+    Each source is read with a keyset range scan on its (username, time)
+    index, fetching at most ``limit + 1`` rows, and the two ordered lists
+    are merged in a single pass. Sessions are placed at their login_time
+    and events at their created_at. Every item is the row's usual to_dict
+    plus ``type`` and ``time``.
+    """
+    streams = []
+    if "session" in types:
+        streams.append(_stream(
+            Log, _SESSIONS, Log.login_time,
+            [Log.username == username, Log.login_time >= start, Log.login_time <= end],
+            cursor, limit + 1,
+        ))
+    actions = sorted(types - {"session"})
+    if actions:
+        streams.append(_stream(
+            Activity, _ACTIVITY, Activity.created_at,
+            [
+                Activity.username == username,
+                Activity.created_at >= start,
+                Activity.created_at <= end,
+                Activity.action.in_(actions),
+            ],
+            cursor, limit + 1,
+        ))
+
+    merged = heapq.merge(*streams, key=lambda entry: entry[:3], reverse=True)
+    page = list(islice(merged, limit + 1))
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    items = []
+    for moment, stream, _, row in page:
+        if stream == _SESSIONS:
+            item = {"type": "session", "time": to_ist_iso(moment), **Log.to_dict(row)}
+        else:
+            item = {"type": row.action, "time": to_ist_iso(moment), **Activity.to_dict(row)}
+        items.append(item)
+
+    next_cursor = None
+    if has_more and page:
+        moment, stream, row_id, _ = page[-1]
+        next_cursor = f"{moment.isoformat()}|{stream}|{row_id}"
+    return items, next_cursor
+
+
+def timeline_window(raw_from, raw_to):
+    """(start, end) from ?from=&to=, defaulting to the DEFAULT_SPAN before now."""
+    end = parse_time_arg(raw_to, "to") or now_ist_naive()
+    start = parse_time_arg(raw_from, "from") or end - DEFAULT_SPAN
+    if start > end:
+        raise ValueError("from must not be after to")
+    return start, end